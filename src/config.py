@@ -1,5 +1,6 @@
 # src/config.py
-import copy
+from types import MappingProxyType
+import numpy as np
 # ----------------------------------------------------------------------
 # EMISSION FACTORS
 # ----------------------------------------------------------------------
@@ -41,6 +42,33 @@ EMISSION_FACTORS = {
     # You can add additional process factors here (e.g., CHEM_DISINFECTION, AUTOCLAVE, MICROWAVE)
 }
 
+# ----------------------------------------------------------------------
+# EMISSION FLOWS
+# ----------------------------------------------------------------------
+# Canonical order of the emission flows tracked by the model. Emission vectors (NumPy arrays)
+# are indexed by this order; FLOW_UNITS gives the (Brightway2) unit each vector entry is expressed in.
+FLOW_ORDER = (
+    "co2_fossil",
+    "co2_biogenic",
+    "ch4_fossil",
+    "ch4_biogenic",
+    "nox",
+    "so2",
+    "pm25",
+    "hg",
+    "pb",
+    "dioxin",
+    "pahs",
+    "nmvoc",
+    "nh3",
+    "pm10",
+    "chlorine_air",
+    "land_occupation",
+)
+FLOW_INDEX = {flow: i for i, flow in enumerate(FLOW_ORDER)}
+FLOW_UNITS = {flow: "kilogram" for flow in FLOW_ORDER}
+FLOW_UNITS["land_occupation"] = "square meter-year"
+
 # ----------------------------------------------------------------------
 # DEFAULT WASTE COMPOSITION
 # ----------------------------------------------------------------------
@@ -231,4 +259,64 @@ NORMALIZATION_FACTORS = {
     "Terrestrial Eco-Toxicity (TE)": 5.09e10,
     "Freshwater Eco-Toxicity (FAE)": 3.07e10,
     "Photochemical Oxidation (PO)": 3.51e11,
-}
\ No newline at end of file
+}
+
+# ----------------------------------------------------------------------
+# HOSPITAL INDIRECT FACTORS AS ARRAYS (one array per factor, indexed by hospital)
+# ----------------------------------------------------------------------
+HOSPITAL_NAMES = tuple(HOSPITAL_INDIRECT_FACTORS)
+
+def _build_indirect_arrays():
+    """
+    Collects each indirect factor into a read-only array ordered like HOSPITAL_NAMES.
+
+    The arrays keep the section structure of the factors ({section: {factor: array}}), so factors of
+    different sections never overwrite each other. A factor missing for a hospital is 0 in its array.
+    """
+    arrays = {}
+    for name in HOSPITAL_NAMES:
+        for section, fields in HOSPITAL_INDIRECT_FACTORS[name].items():
+            section_arrays = arrays.setdefault(section, {})
+            for key in fields:
+                section_arrays.setdefault(key, None)
+    for section, section_arrays in arrays.items():
+        for key in section_arrays:
+            arr = np.array(
+                [HOSPITAL_INDIRECT_FACTORS[name].get(section, {}).get(key, 0) for name in HOSPITAL_NAMES],
+                dtype=np.float64,
+            )
+            arr.setflags(write=False)
+            section_arrays[key] = arr
+    return arrays
+
+INDIRECT_ARRAYS = _build_indirect_arrays()
+
+# ----------------------------------------------------------------------
+# READ-ONLY VIEWS
+# ----------------------------------------------------------------------
+def _freeze(value):
+    """Recursively wraps dictionaries in read-only MappingProxyType views."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+# The configuration is shared by every process and scenario, so it is exposed read-only. Code that
+# needs to adjust a value works on its own copy (e.g. dict(factors)) instead of deep-copying per call.
+EMISSION_FACTORS = _freeze(EMISSION_FACTORS)
+DEFAULT_COMPOSITION = _freeze(DEFAULT_COMPOSITION)
+HOSPITAL_INDIRECT_FACTORS = _freeze(HOSPITAL_INDIRECT_FACTORS)
+IMPACT_CATEGORIES = _freeze(IMPACT_CATEGORIES)
+NORMALIZATION_FACTORS = _freeze(NORMALIZATION_FACTORS)
+
+# Private (group, fractions) template of DEFAULT_COMPOSITION with plain dicts, built once: dict.copy() of
+# a plain dict is several times faster than copying the read-only views, and a WasteStream is created
+# for every hospital and scenario. The template's dicts are never handed out, only copies of them.
+_DEFAULT_COMPOSITION_TEMPLATE = tuple((group, dict(fractions)) for group, fractions in DEFAULT_COMPOSITION.items())
+
+def _build_default_composition():
+    """
+    Returns a fresh, mutable copy of DEFAULT_COMPOSITION.
+
+    The fractions are floats, so copying each material group's dict is enough; no deep copy is needed.
+    """
+    return {group: fractions.copy() for group, fractions in _DEFAULT_COMPOSITION_TEMPLATE}
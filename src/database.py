@@ -1,8 +1,17 @@
 # HospitalWasteManagement/src/database.py
+import hashlib
+import json
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 import brightway2 as bw
+from bw2data.backends.peewee import Activity, ActivityDataset, ExchangeDataset, sqlite3_lci_db
+from bw2data.backends.peewee.utils import dict_as_exchangedataset
+from bw2data.errors import UnknownObject
+from src import config
+from src.units import BW_UNITS
 
 def setup_project(project_name: str) -> bw.Database:
     """
@@ -18,101 +27,169 @@ def setup_project(project_name: str) -> bw.Database:
         bw.projects.create_project(project_name)
         logging.info(f"Created project '{project_name}'.")
     bw.projects.set_current(project_name)
-    bw.bw2setup()  # Sets up biosphere3.
-    logging.info("Biosphere3 setup complete.")
+    # bw2setup is only needed once per project; the check reads the project's database metadata, so it
+    # stays correct if the project is deleted or recreated in the same process.
+    if "biosphere3" in bw.databases:
+        logging.info("Biosphere3 already present.")
+    else:
+        bw.bw2setup()  # Sets up biosphere3.
+        logging.info("Biosphere3 setup complete.")
     return bw.Database("biosphere3")
 
-def build_flow_index(bio_db: bw.Database) -> Dict[str, Any]:
-    """
-    Builds an index of flows from the biosphere database keyed by their 'code' (UUID).
-    
-    Args:
-        bio_db (bw.Database): The biosphere database.
-    
-    Returns:
-        Dict[str, Any]: A dictionary mapping flow codes to flow objects.
-    """
-    index = {}
-    for flow in bio_db:
-        index[flow["code"]] = flow
-    return index
+# UUIDs (biosphere3 codes) of the biosphere flows used in the modeling, keyed by short name.
+FLOW_UUIDS = {
+    "co2_fossil": "aa7cac3a-3625-41d4-bc54-33e2cf11ec46",
+    "co2_biogenic": "d6235194-e4e6-4548-bfa3-ac095131aef4",
+    "ch4_fossil": "70ef743b-3ed5-4a6d-b192-fb6d62378555",
+    "ch4_biogenic": "da1157e2-7593-4dfd-80dd-a3449b37a4d8",
+    "nox": "77357947-ccc5-438e-9996-95e65e1e1bce",
+    "so2": "78c3efe4-421c-4d30-82e4-b97ac5124993",
+    "pm25": "66f50b33-fd62-4fdd-a373-c5b0de7de00d",
+    "hg": "5ec9c16a-959d-44cd-be7d-a935727d2151",
+    "pb": "2718482b-8399-442e-b89a-52fbcc22d2e6",
+    "dioxin": "f77c5e36-ee47-4437-b757-03139bb1d6d6",
+    "pahs": "13d898ac-b9be-4723-a153-565e2a9144ac",
+    "nmvoc": "33b38ccb-593b-4b11-b965-10d747ba3556",
+    "nh3": "0f440cc0-0f74-446d-99d6-8ff0e97a2444",
+    "pm10": "7678cec7-b8e1-439d-8242-99cd452834b1",
+    "chlorine_air": "247ac273-60fa-4e21-9408-793f75fa1d37",
+    "land_occupation": "1eaa9ea4-40b8-414a-b198-5626400372e1",
+}
 
-def get_flow_by_uuid(flow_index: Dict[str, Any], uuid: str) -> Any:
+def get_flow_by_uuid(bio_db: bw.Database, uuid: str) -> Any:
     """
-    Retrieves a flow from the pre-built flow index using its UUID.
+    Retrieves a single flow from the biosphere database using its UUID (the flow's 'code').
+    
+    The flow is looked up directly by its code, so only the requested row is loaded
+    instead of materializing every flow in the database.
     
     Args:
-        flow_index (Dict[str, Any]): The index of flows.
+        bio_db (bw.Database): The biosphere database.
         uuid (str): The UUID of the desired flow.
     
     Returns:
         Any: The biosphere flow object corresponding to the UUID.
     
     Raises:
-        KeyError: If the flow with the provided UUID is not found.
+        KeyError: If the flow with the provided UUID is not found. Other database errors propagate unchanged.
     """
-    if uuid in flow_index:
-        return flow_index[uuid]
-    else:
+    try:
+        return bio_db.get(uuid)
+    except (UnknownObject, ActivityDataset.DoesNotExist) as exc:
         logging.error(f"Flow with UUID {uuid} not found.")
-        raise KeyError(f"Flow with UUID {uuid} missing.")
+        raise KeyError(f"Flow with UUID {uuid} missing.") from exc
 
-def retrieve_flows(flow_index: Dict[str, Any]) -> Dict[str, Any]:
+def retrieve_flows(bio_db: bw.Database) -> Dict[str, Any]:
     """
     Retrieves a dictionary of biosphere flows used in the modeling. The keys are short names
     (e.g., 'co2_fossil', 'so2') and the values are the corresponding flow objects.
     
+    All flows are fetched with a single query (WHERE code IN (...)) instead of one lookup per flow. The
+    result is cached per project, database and database version (its 'modified' timestamp), so later
+    calls do not query the database again until the biosphere database is rewritten.
+    
     Args:
-        flow_index (Dict[str, Any]): The pre-built index of flows from the biosphere database.
+        bio_db (bw.Database): The biosphere database.
     
     Returns:
-        Dict[str, Any]: A dictionary mapping short names to biosphere flow objects.
-    """
-    flow_uuids = {
-        "co2_fossil": "aa7cac3a-3625-41d4-bc54-33e2cf11ec46",
-        "co2_biogenic": "d6235194-e4e6-4548-bfa3-ac095131aef4",
-        "ch4_fossil": "70ef743b-3ed5-4a6d-b192-fb6d62378555",
-        "ch4_biogenic": "da1157e2-7593-4dfd-80dd-a3449b37a4d8",
-        "nox": "77357947-ccc5-438e-9996-95e65e1e1bce",
-        "so2": "78c3efe4-421c-4d30-82e4-b97ac5124993",
-        "pm25": "66f50b33-fd62-4fdd-a373-c5b0de7de00d",
-        "hg": "5ec9c16a-959d-44cd-be7d-a935727d2151",
-        "pb": "2718482b-8399-442e-b89a-52fbcc22d2e6",
-        "dioxin": "f77c5e36-ee47-4437-b757-03139bb1d6d6",
-        "pahs": "13d898ac-b9be-4723-a153-565e2a9144ac",
-        "nmvoc": "33b38ccb-593b-4b11-b965-10d747ba3556",
-        "nh3": "0f440cc0-0f74-446d-99d6-8ff0e97a2444",
-        "pm10": "7678cec7-b8e1-439d-8242-99cd452834b1",
-        "chlorine_air": "247ac273-60fa-4e21-9408-793f75fa1d37",
-        "land_occupation": "1eaa9ea4-40b8-414a-b198-5626400372e1",
-    }
+        Dict[str, Any]: A dictionary mapping short names to biosphere flow objects
+            (None for flows that are not present in the database).
+    """
+    version = bw.databases.get(bio_db.name, {}).get("modified")
+    return dict(_query_flows(bw.projects.current, bio_db.name, version))
+
+@lru_cache(maxsize=8)
+def _query_flows(project_name: str, db_name: str, version: Optional[str]) -> Mapping[str, Any]:
+    """
+    Fetches the modeling flows of a biosphere database (see retrieve_flows).
+    
+    The project name and database version are part of the cache key only; the query runs against the
+    current project. The cached flows are returned as a read-only view.
+    """
+    rows = ActivityDataset.select().where(
+        (ActivityDataset.database == db_name) & (ActivityDataset.code.in_(list(FLOW_UUIDS.values())))
+    )
+    flows_by_uuid = {row.code: Activity(row) for row in rows}
     flows = {}
-    for key, uuid in flow_uuids.items():
-        try:
-            flows[key] = get_flow_by_uuid(flow_index, uuid)
-        except KeyError:
-            flows[key] = None
-    return flows
+    for key, uuid in FLOW_UUIDS.items():
+        flows[key] = flows_by_uuid.get(uuid)
+        if flows[key] is None:
+            logging.error(f"Flow with UUID {uuid} not found.")
+    return MappingProxyType(flows)
+
+def compute_config_hash(*objects: Any) -> str:
+    """
+    Computes a stable SHA-256 hash over the given configuration objects.
+    
+    The objects are serialized with json.dumps (keys sorted), so two configurations with equal
+    content always produce the same hash regardless of dictionary ordering.
+    
+    Args:
+        *objects: JSON-serializable configuration objects (e.g., scenarios, hospitals, factor dictionaries or
+            other mappings).
+    
+    Returns:
+        str: The hexadecimal SHA-256 digest.
+    """
+    # Read-only mappings (e.g., the frozen config tables) are serialized like plain dictionaries.
+    payload = json.dumps(
+        objects, sort_keys=True, default=lambda obj: dict(obj) if isinstance(obj, Mapping) else str(obj)
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-def create_or_reset_db(db_name: str) -> bw.Database:
+def db_matches_hash(db_name: str, config_hash: str) -> bool:
+    """
+    Checks whether a database exists and was built from the configuration with the given hash.
+    
+    Args:
+        db_name (str): The name of the database.
+        config_hash (str): The configuration hash (see compute_config_hash).
+    
+    Returns:
+        bool: True if the database is registered and tagged with the same hash.
+    """
+    return db_name in bw.databases and bw.databases[db_name].get("config_hash") == config_hash
+
+def tag_db_hash(db: bw.Database, config_hash: str):
+    """
+    Stores the configuration hash in the database metadata so later runs can reuse the database.
+    
+    This should only be called once the database content is complete.
+    
+    Args:
+        db (bw.Database): The database to tag.
+        config_hash (str): The configuration hash (see compute_config_hash).
+    """
+    db.metadata["config_hash"] = config_hash
+    bw.databases.flush()
+
+def create_or_reset_db(db_name: str, expected_hash: Optional[str] = None) -> bw.Database:
     """
     Creates a new database or resets an existing one by deleting it and re-registering.
     
     Args:
         db_name (str): The name of the database.
+        expected_hash (str, optional): If provided and the existing database is tagged with the same
+            configuration hash, the database is returned unchanged instead of being reset.
     
     Returns:
-        bw.Database: The newly created and registered database.
+        bw.Database: The newly created and registered database (or the reused one).
     """
+    if expected_hash is not None and db_matches_hash(db_name, expected_hash):
+        logging.info(f"Reusing database '{db_name}' (configuration unchanged).")
+        return bw.Database(db_name)
     if db_name in bw.databases:
-        bw.Database(db_name).delete(force=True)
+        bw.Database(db_name).delete(warn=False)
         logging.info(f"Deleted existing database '{db_name}'.")
     db = bw.Database(db_name)
     db.register()
+    # Drop any hash left over from a previous build; the new content is not complete yet.
+    db.metadata.pop("config_hash", None)
+    bw.databases.flush()
     logging.info(f"Created and registered database '{db_name}'.")
     return db
 
-def create_activity(db: bw.Database, code: str, name: str, unit: str = "kilogram") -> bw.Activity:
+def create_activity(db: bw.Database, code: str, name: str, unit: str = "kilogram") -> Activity:
     """
     Creates a new activity in the specified database.
     
@@ -123,7 +200,7 @@ def create_activity(db: bw.Database, code: str, name: str, unit: str = "kilogram
         unit (str): The unit for the activity (default is "kilogram").
     
     Returns:
-        bw.Activity: The newly created activity.
+        Activity: The newly created activity.
     """
     act = db.new_activity(code=code)
     act["name"] = name
@@ -131,12 +208,12 @@ def create_activity(db: bw.Database, code: str, name: str, unit: str = "kilogram
     act.save()
     return act
 
-def add_production_exchange(act: bw.Activity, amount: float = 1.0):
+def add_production_exchange(act: Activity, amount: float = 1.0):
     """
     Adds a production exchange to the activity. Any existing production exchanges are removed.
     
     Args:
-        act (bw.Activity): The activity for which to add the production exchange.
+        act (Activity): The activity for which to add the production exchange.
         amount (float): The amount for the production exchange (default is 1.0).
     """
     for exc in list(act.exchanges()):
@@ -149,31 +226,91 @@ def add_production_exchange(act: bw.Activity, amount: float = 1.0):
         input=act.key
     ).save()
 
-def add_biosphere_exchanges(act: bw.Activity, emissions: Dict[str, Any], flows: Dict[str, Any]):
+def biosphere_exchange_data(emissions: Dict[str, Any], flows: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Adds biosphere exchanges to an activity based on calculated emissions.
+    Builds biosphere exchange dictionaries (in Brightway2's dataset format) from calculated emissions.
     
     Args:
-        act (bw.Activity): The activity to which exchanges are added.
-        emissions (Dict[str, Any]): A dictionary mapping emission keys (e.g., 'co2_fossil', 'so2') to emission amounts.
-        flows (Dict[str, Any]): A dictionary mapping emission keys to biosphere flow objects.
+        emissions (Dict[str, Any]): A dictionary mapping emission keys (e.g., 'co2_fossil', 'so2') to emission amounts,
+            either as Pint quantities or as plain floats expressed in the flow's unit from config.FLOW_UNITS.
+            Quantities are converted to that unit, so both forms write the same exchange unit.
+        flows (Dict[str, Any]): A dictionary mapping emission keys to biosphere flow objects or directly to
+            their (database, code) keys.
     
-    For each emission in the emissions dictionary, if a corresponding flow exists, an exchange is created.
+    Returns:
+        List[Dict[str, Any]]: One exchange dictionary per emission that has a corresponding flow.
+            Negligible amounts are skipped, and emissions without a flow are logged and skipped.
     """
+    exchanges = []
     for flow_name, amount in emissions.items():
+        unit = config.FLOW_UNITS[flow_name]
+        value = amount.m_as(BW_UNITS[unit]) if hasattr(amount, "units") else amount
+        # Skip negligible amounts.
+        if abs(value) <= 1e-15:
+            continue
         flow_obj = flows.get(flow_name)
         if flow_obj is None:
             logging.error(f"Missing flow for '{flow_name}'. Skipping exchange.")
             continue
-        # Skip negligible amounts.
-        if abs(amount.magnitude) <= 1e-15:
-            continue
-        try:
-            act.new_exchange(
-                amount=amount.magnitude,
-                type="biosphere",
-                unit=str(amount.units),
-                input=flow_obj.key
-            ).save()
-        except Exception as e:
-            logging.error(f"Failed to add exchange for '{act['name']}' with flow '{flow_name}': {e}")
+        exchanges.append({
+            "amount": value,
+            "type": "biosphere",
+            "unit": unit,
+            "input": getattr(flow_obj, "key", flow_obj),
+        })
+    return exchanges
+
+def build_activity_data(db_name: str, code: str, name: str, emissions: Dict[str, Any], flows: Dict[str, Any],
+                        unit: str = "kilogram") -> Dict[str, Any]:
+    """
+    Builds a complete activity dataset (production exchange plus biosphere exchanges) for use with
+    bw.Database.write, so that a whole database can be written in a single transaction.
+    
+    Args:
+        db_name (str): The name of the database the activity belongs to.
+        code (str): A unique code for the activity.
+        name (str): The name of the activity.
+        emissions (Dict[str, Any]): A dictionary mapping emission keys to emission amounts.
+        flows (Dict[str, Any]): A dictionary mapping emission keys to biosphere flow objects or flow keys.
+        unit (str): The unit for the activity (default is "kilogram").
+    
+    Returns:
+        Dict[str, Any]: The activity dataset, to be stored under the key (db_name, code).
+    """
+    production = {"amount": 1.0, "type": "production", "unit": unit, "input": (db_name, code)}
+    return {
+        "name": name,
+        "unit": unit,
+        "exchanges": [production] + biosphere_exchange_data(emissions, flows),
+    }
+
+def add_biosphere_exchanges(act: Activity, emissions: Dict[str, Any], flows: Dict[str, Any]):
+    """
+    Adds biosphere exchanges to an activity based on calculated emissions.
+    
+    Args:
+        act (Activity): The activity to which exchanges are added.
+        emissions (Dict[str, Any]): A dictionary mapping emission keys (e.g., 'co2_fossil', 'so2') to emission amounts.
+        flows (Dict[str, Any]): A dictionary mapping emission keys to biosphere flow objects.
+    
+    For each emission in the emissions dictionary, if a corresponding flow exists, an exchange is created.
+    The exchanges are inserted with bulk INSERTs in one transaction instead of one save (and commit) per
+    exchange. To populate many activities at once, prefer build_activity_data with a single bw.Database.write.
+    """
+    rows = [
+        dict_as_exchangedataset(dict(exchange, output=act.key))
+        for exchange in biosphere_exchange_data(emissions, flows)
+    ]
+    if not rows:
+        return
+    try:
+        with sqlite3_lci_db.atomic():
+            # SQLite limits the number of variables per statement, so insert the rows in chunks
+            # (the chunk size Brightway itself uses for bulk writes).
+            for start in range(0, len(rows), 125):
+                ExchangeDataset.insert_many(rows[start:start + 125]).execute()
+    except Exception as e:
+        logging.error(f"Failed to add biosphere exchanges for '{act['name']}': {e}")
+        return
+    # Like Exchange.save, mark the database as modified so it is processed again before use.
+    bw.databases.set_dirty(act.key[0])
@@ -1,8 +1,48 @@
 # HospitalWasteManagement/src/indirect.py
-import pint
+from typing import Mapping, Optional
+import numpy as np
+from src import config
+from src.units import ureg, BW_UNITS
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# Pint unit of each emission, from the flow's unit in config.FLOW_UNITS.
+_UNITS = {flow: BW_UNITS[unit] for flow, unit in config.FLOW_UNITS.items()}
+
+def _fold_coefficients(energy: Mapping, transport: Mapping, infra: Mapping, downstream: Mapping) -> dict:
+    """
+    Folds the energy, transportation, infrastructure and downstream factors into one per-kg
+    coefficient for each indirect emission (every indirect emission is linear in the waste mass).
+    
+    The arithmetic works on floats as well as on NumPy arrays, so the same function folds the
+    factors of a single hospital or of all hospitals at once (see HOSPITAL_COEFFS).
+    Transport factors are per tonne-kilometer.
+    """
+    energy_use = energy.get("energy_use_kWh_per_kg", 0)  # kWh used per kg of waste processed
+    tonnes_km_per_kg = transport.get("distance_km", 0) / 1000.0
+    residue_ratio = downstream.get("residue_ratio", 0)
+    return {
+        "co2_fossil": (
+            energy_use * energy.get("co2_fossil_per_kWh", 0)
+            + tonnes_km_per_kg * transport.get("co2_fossil_per_tkm", 0)
+            + infra.get("construction_co2_per_kg", 0)
+            + residue_ratio * downstream.get("residue_co2_per_kg", 0)
+        ),
+        "so2": (
+            energy_use * energy.get("so2_per_kWh", 0)
+            + residue_ratio * downstream.get("residue_so2_per_kg", 0)
+        ),
+        "pm25": energy_use * energy.get("pm25_per_kWh", 0),
+        "nox": tonnes_km_per_kg * transport.get("nox_per_tkm", 0),
+        "land_occupation": infra.get("land_use_factor", 0),
+    }
+
+# Per-kg coefficients for every hospital in config.HOSPITAL_NAMES, folded in one vectorized pass
+# over the per-factor arrays of each section (each value is an array indexed by hospital).
+HOSPITAL_COEFFS = _fold_coefficients(
+    config.INDIRECT_ARRAYS.get("energy_inputs", {}),
+    config.INDIRECT_ARRAYS.get("transportation", {}),
+    config.INDIRECT_ARRAYS.get("infrastructure", {}),
+    config.INDIRECT_ARRAYS.get("downstream", {}),
+)
 
 class IndirectEmissionsCalculator:
     """
@@ -44,60 +84,56 @@ class IndirectEmissionsCalculator:
             },
         }
     """
-    def __init__(self, factors: dict):
+    def __init__(self, factors: dict, hospital_index: Optional[int] = None):
         """
         Initializes the calculator with a dictionary of hospital-specific factors.
         
         Args:
             factors (dict): A dictionary containing the sub-dictionaries for each emission category.
+            hospital_index (int, optional): The position of the hospital in config.HOSPITAL_NAMES. When given,
+                the per-kg coefficients are sliced from the precomputed HOSPITAL_COEFFS arrays instead of
+                being folded from the factors again.
         """
         self.factors = factors
+        
+        if hospital_index is not None:
+            self._coeffs = {key: float(arr[hospital_index]) for key, arr in HOSPITAL_COEFFS.items()}
+        else:
+            self._coeffs = _fold_coefficients(
+                factors.get("energy_inputs", {}),
+                factors.get("transportation", {}),
+                factors.get("infrastructure", {}),
+                factors.get("downstream", {}),
+            )
+        
+        # The same coefficients laid out as a flow vector ordered like config.FLOW_ORDER, in the units of
+        # config.FLOW_UNITS (kg, and m2*year for land occupation).
+        self._coeff_vector = np.zeros(len(config.FLOW_ORDER), dtype=np.float64)
+        for key, coeff in self._coeffs.items():
+            self._coeff_vector[config.FLOW_INDEX[key]] = coeff
     
     def calculate(self, waste) -> dict:
         """
         Calculates the indirect emissions for the given waste stream.
         
         Args:
-            waste: An object that has a 'mass' attribute (a Pint quantity).
+            waste: A WasteStream (or any object with a 'mass_kg' attribute giving the mass in kg).
         
         Returns:
             dict: A dictionary mapping emission keys (e.g., "co2_fossil", "so2") to Pint quantities.
         """
-        # Convert the waste mass to kilograms.
-        mass = waste.mass.to("kg").magnitude
-        
-        # Retrieve sub-dictionaries for each emission category.
-        energy = self.factors.get("energy_inputs", {})
-        transport = self.factors.get("transportation", {})
-        infra = self.factors.get("infrastructure", {})
-        downstream = self.factors.get("downstream", {})
-        
-        emissions = {}
-        
-        # Calculate energy-related emissions.
-        energy_use = mass * energy.get("energy_use_kWh_per_kg", 0)  # kWh used by the waste processing
-        emissions["co2_fossil"] = energy_use * energy.get("co2_fossil_per_kWh", 0) * ureg("kg")
-        emissions["so2"] = energy_use * energy.get("so2_per_kWh", 0) * ureg("kg")
-        emissions["pm25"] = energy_use * energy.get("pm25_per_kWh", 0) * ureg("kg")
-        
-        # Calculate transportation emissions.
-        waste_tonnes = mass / 1000.0  # Convert mass from kg to tonnes.
-        distance = transport.get("distance_km", 0)
-        tkm = waste_tonnes * distance  # tonne-kilometers.
-        # Add transportation emissions to any pre-existing CO2 emissions.
-        emissions["co2_fossil"] += tkm * transport.get("co2_fossil_per_tkm", 0) * ureg("kg")
-        emissions["nox"] = tkm * transport.get("nox_per_tkm", 0) * ureg("kg")
-        
-        # Calculate infrastructure-related emissions.
-        infra_co2 = mass * infra.get("construction_co2_per_kg", 0) * ureg("kg")
-        emissions["co2_fossil"] += infra_co2
-        emissions["land_occupation"] = mass * infra.get("land_use_factor", 0) * ureg("square_meter-year")
+        # Waste mass in kilograms (converted once when the waste stream is created).
+        mass = waste.mass_kg
+        return {key: ureg.Quantity(mass * coeff, _UNITS[key]) for key, coeff in self._coeffs.items()}
+    
+    def calculate_vector(self, waste) -> np.ndarray:
+        """
+        Calculates the indirect emissions for the given waste stream as a flow vector.
         
-        # Calculate downstream emissions (e.g., residues).
-        residue_mass = mass * downstream.get("residue_ratio", 0)
-        residue_co2 = residue_mass * downstream.get("residue_co2_per_kg", 0) * ureg("kg")
-        residue_so2 = residue_mass * downstream.get("residue_so2_per_kg", 0) * ureg("kg")
-        emissions["co2_fossil"] += residue_co2
-        emissions["so2"] += residue_so2
+        Args:
+            waste: A WasteStream (or any object with a 'mass_kg' attribute giving the mass in kg).
         
-        return emissions
\ No newline at end of file
+        Returns:
+            np.ndarray: A float64 array ordered like config.FLOW_ORDER, in the units of config.FLOW_UNITS.
+        """
+        return waste.mass_kg * self._coeff_vector
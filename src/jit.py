@@ -0,0 +1,21 @@
+# HospitalWasteManagement/src/jit.py
+
+"""
+Optional Numba support.
+
+When Numba is installed, `njit` is Numba's own, so decorated functions are compiled to native code.
+Without Numba, `njit` returns the function unchanged, so the same functions run as plain Python/NumPy
+code.
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op replacement for numba.njit, usable both as @njit and as @njit(...)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -1,14 +1,18 @@
 # HospitalWasteManagement/src/lcia.py
 
 import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
 import brightway2 as bw
+from bw2data.backends.peewee import Activity
 
-def compute_lcia(activity: bw.Activity, method: tuple) -> float:
+def compute_lcia(activity: Activity, method: tuple) -> float:
     """
     Computes the Life Cycle Impact Assessment (LCIA) score for a given activity using a specified LCIA method.
 
     Args:
-        activity (bw.Activity): The Brightway2 activity for which the LCIA is calculated.
+        activity (Activity): The Brightway2 activity for which the LCIA is calculated.
         method (tuple): The LCIA method tuple (e.g., ('CML v4.8 2016', 'climate change', 'global warming potential (GWP100)')).
 
     Returns:
@@ -25,3 +29,125 @@ def compute_lcia(activity: bw.Activity, method: tuple) -> float:
     except Exception as e:
         logging.error(f"Error computing LCIA for activity '{activity['name']}': {e}")
         return 0.0
+
+def compute_lcia_multi(activity: Activity, methods: List[tuple]) -> Dict[tuple, float]:
+    """
+    Computes the LCIA scores of a single activity for several LCIA methods.
+
+    The inventory is calculated (and the technosphere matrix factorized) once with the first method;
+    every further method only swaps the characterization matrix and recomputes the impact assessment.
+
+    Args:
+        activity (Activity): The Brightway2 activity for which the LCIA is calculated.
+        methods (List[tuple]): The LCIA method tuples to apply.
+
+    Returns:
+        Dict[tuple, float]: A dictionary mapping each method to the score for one unit of the activity.
+
+    Methods that fail are logged and scored as 0.0, mirroring compute_lcia.
+    """
+    scores = {}
+    if not methods:
+        return scores
+    
+    try:
+        lca = bw.LCA({activity: 1}, methods[0])
+        lca.lci(factorize=True)
+        lca.lcia()
+        scores[methods[0]] = lca.score
+    except Exception as e:
+        logging.error(f"Error computing LCIA for activity '{activity['name']}': {e}")
+        return {method: 0.0 for method in methods}
+    
+    for method in methods[1:]:
+        try:
+            lca.switch_method(method)
+            lca.lcia_calculation()
+            scores[method] = lca.score
+        except Exception as e:
+            logging.error(f"Error computing LCIA for activity '{activity['name']}' with method {method}: {e}")
+            scores[method] = 0.0
+    return scores
+
+def compute_lcia_batch(activities: List[Activity], methods: List[tuple]) -> Dict[Tuple[str, tuple], float]:
+    """
+    Computes LCIA scores for every combination of the given activities and LCIA methods.
+
+    A single LCA object is built and its technosphere matrix is factorized once. Each activity
+    then only requires a new solve against the factorized matrix, and each method only requires
+    loading its characterization matrix once, instead of building a fresh LCA per combination.
+    When the activities are not linked to each other (a diagonal technosphere matrix), no solves are
+    needed at all: each method scores every activity at once from the characterized biosphere matrix.
+
+    Args:
+        activities (List[Activity]): The activities to assess (one unit of each is the functional unit).
+        methods (List[tuple]): The LCIA method tuples to apply to every activity.
+
+    Returns:
+        Dict[Tuple[str, tuple], float]: A dictionary mapping (activity code, method) to the LCIA score.
+
+    Combinations that fail are logged and scored as 0.0, mirroring compute_lcia.
+    """
+    scores = {}
+    if not activities or not methods:
+        return scores
+    
+    try:
+        # Build the LCA once and keep the factorized technosphere matrix for all later solves.
+        lca = bw.LCA({activities[0]: 1}, methods[0])
+        lca.lci(factorize=True)
+        lca.lcia()
+    except Exception as e:
+        logging.error(f"Error setting up batch LCIA: {e}")
+        return {(act["code"], method): 0.0 for act in activities for method in methods}
+    
+    # Without links between activities the technosphere matrix is diagonal, so every activity's supply
+    # vector is just the inverse of its production amount. The scores of all activities for a method
+    # are then the column sums of C @ B scaled by that amount, which avoids one solve per activity.
+    columns = _diagonal_columns(lca, activities)
+    
+    for i, method in enumerate(methods):
+        try:
+            if i > 0:
+                # Only the characterization matrix changes between methods.
+                lca.switch_method(method)
+        except Exception as e:
+            logging.error(f"Error loading LCIA method {method}: {e}")
+            for act in activities:
+                scores[(act["code"], method)] = 0.0
+            continue
+        if columns is not None:
+            column_scores = np.asarray((lca.characterization_matrix @ lca.biosphere_matrix).sum(axis=0)).ravel()
+            column_scores /= lca.technosphere_matrix.diagonal()
+            for act, column in zip(activities, columns):
+                scores[(act["code"], method)] = float(column_scores[column])
+            continue
+        for act in activities:
+            try:
+                # Swap the functional unit and re-solve using the existing factorization.
+                lca.redo_lcia({act: 1})
+                scores[(act["code"], method)] = lca.score
+            except Exception as e:
+                logging.error(f"Error computing LCIA for activity '{act['name']}': {e}")
+                scores[(act["code"], method)] = 0.0
+    return scores
+
+def _diagonal_columns(lca, activities: List[Activity]) -> Optional[List[int]]:
+    """
+    Returns the matrix column of each activity if the technosphere matrix is diagonal, otherwise None.
+
+    The technosphere matrix counts as diagonal when it has no off-diagonal entries, no zero production
+    amounts, and every activity's product row matches its activity column.
+    """
+    try:
+        technosphere = lca.technosphere_matrix
+        diagonal = technosphere.diagonal()
+        if (technosphere - sparse.diags(diagonal)).count_nonzero() or not np.all(diagonal):
+            return None
+        columns = [lca.activity_dict[act.key] for act in activities]
+        if any(lca.product_dict[act.key] != column for act, column in zip(activities, columns)):
+            return None
+        return columns
+    except Exception as e:
+        logging.warning(f"Could not inspect the technosphere matrix, solving per activity: {e}")
+        return None
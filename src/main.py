@@ -3,11 +3,14 @@
 import logging
 from pathlib import Path
 import csv
+from typing import Any, Dict, List, Tuple
+import numpy as np
 import brightway2 as bw
-import pint
+from src.units import ureg, KG
 
 from src import config
-from src.waste_stream import WasteStream
+from src.jit import njit
+from src.waste_stream import WasteStream, WasteStreamBatch
 from src.processes.incineration import IncinerationProcess
 from src.processes.landfill import LandfillProcess
 from src.processes.pyrolysis import PyrolysisProcess
@@ -17,17 +20,193 @@ from src.processes.microwave import MicrowaveProcess
 from src.indirect import IndirectEmissionsCalculator
 from src.database import (
     setup_project,
-    build_flow_index,
     retrieve_flows,
+    compute_config_hash,
+    db_matches_hash,
+    tag_db_hash,
     create_or_reset_db,
-    create_activity,
-    add_production_exchange,
-    add_biosphere_exchanges
+    build_activity_data
 )
-from src.lcia import compute_lcia
+from src.lcia import compute_lcia_batch
 
-# Initialize a Pint unit registry.
-ureg = pint.UnitRegistry()
+@njit("Tuple((int64[:, :], float32[:, :]))(float32[:, :, :, :], float32[:])", cache=True)
+def flatten_norm(raw, factors):
+    """
+    Flattens the 4-D raw score array and normalizes every score.
+    
+    Args:
+        raw (np.ndarray): Raw scores indexed by (scenario, hospital, process, impact category).
+        factors (np.ndarray): Normalization factor per impact category; a zero factor yields NaN.
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: A (S*H*P*C, 4) integer array whose rows are (s_idx, h_idx, p_idx, c_idx)
+            and a (S*H*P*C, 2) array of raw's dtype whose rows are (raw, norm), both in the same C order as
+            raw.ravel(). The indices are kept in their own integer array so they stay exact.
+    """
+    n_s, n_h, n_p, n_c = raw.shape
+    indices = np.empty((n_s * n_h * n_p * n_c, 4), dtype=np.int64)
+    scores = np.empty((n_s * n_h * n_p * n_c, 2), dtype=raw.dtype)
+    for s in range(n_s):
+        for h in range(n_h):
+            for p in range(n_p):
+                for c in range(n_c):
+                    row = ((s * n_h + h) * n_p + p) * n_c + c
+                    score = raw[s, h, p, c]
+                    indices[row, 0] = s
+                    indices[row, 1] = h
+                    indices[row, 2] = p
+                    indices[row, 3] = c
+                    scores[row, 0] = score
+                    scores[row, 1] = score / factors[c] if factors[c] != 0 else np.nan
+    return indices, scores
+
+def adjust_hospital_waste(
+    scenarios: Dict[str, Dict[str, Any]], hospitals: List[Dict[str, Any]]
+) -> Dict[float, List[WasteStream]]:
+    """
+    Builds each hospital's default-composition waste stream adjusted for segregation.
+    
+    An adjusted stream only depends on the hospital's waste mass and the segregation efficiency, so
+    the streams are built once per distinct efficiency and shared by every
+    scenario (and process) with that efficiency.
+    
+    Args:
+        scenarios (Dict[str, Dict[str, Any]]): The scenario parameters keyed by scenario name.
+        hospitals (List[Dict[str, Any]]): Hospitals, each with a name and waste mass in kg.
+    
+    Returns:
+        Dict[float, List[WasteStream]]: For each segregation efficiency, the adjusted waste stream of each
+            hospital, in the order of hospitals. Callers must not modify them.
+    """
+    adjusted_wastes = {}
+    for scen in scenarios.values():
+        segregation_efficiency = scen["segregation_efficiency"]
+        if segregation_efficiency not in adjusted_wastes:
+            adjusted_wastes[segregation_efficiency] = [
+                WasteStream(mass=ureg.Quantity(hospital["waste"], KG)).adjust_for_segregation(segregation_efficiency)
+                for hospital in hospitals
+            ]
+    return adjusted_wastes
+
+def build_processes() -> Dict[str, Any]:
+    """
+    Creates the treatment process models from the configured emission factors.
+    
+    Returns:
+        Dict[str, Any]: Treatment process objects keyed by process name. Processes without configured
+                        factors get an empty factor dictionary.
+    """
+    return {
+        "INCINERATION": IncinerationProcess("Incineration", config.EMISSION_FACTORS["INCINERATION"]),
+        "LANDFILL": LandfillProcess("Landfill", config.EMISSION_FACTORS["LANDFILL"]),
+        "PYROLYSIS": PyrolysisProcess("Pyrolysis", config.EMISSION_FACTORS["PYROLYSIS"]),
+        "CHEM_DISINFECTION": ChemDisinfectionProcess("Chemical Disinfection", config.EMISSION_FACTORS.get("CHEM_DISINFECTION", {})),
+        "AUTOCLAVE": AutoclaveProcess("Autoclave", config.EMISSION_FACTORS.get("AUTOCLAVE", {})),
+        "MICROWAVE": MicrowaveProcess("Microwave", config.EMISSION_FACTORS.get("MICROWAVE", {}))
+    }
+
+def compute_direct_emissions(
+    scenarios: Dict[str, Dict[str, Any]], adjusted_wastes: Dict[float, List[WasteStream]], processes: Dict[str, Any]
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Computes the direct emission matrices of every scenario and treatment process.
+    
+    This runs before the scenarios are assembled (see run_scenario), so scenarios can share results: a
+    process's direct emissions only depend on the segregation efficiency and on the scenario parameters
+    the process reads (its scenario signature). Each distinct (process, efficiency, signature) combination
+    is computed once, with all hospitals evaluated as one batch, and the matrix is shared by every scenario
+    with that combination.
+    
+    Args:
+        scenarios (Dict[str, Dict[str, Any]]): The scenario parameters keyed by scenario name.
+        adjusted_wastes (Dict[float, List[WasteStream]]): The hospitals' adjusted waste streams for each
+            segregation efficiency (see adjust_hospital_waste).
+        processes (Dict[str, Any]): The treatment process objects keyed by process name.
+    
+    Returns:
+        Dict[str, Dict[str, np.ndarray]]: For each scenario, a read-only (number of hospitals, len(config.FLOW_ORDER))
+            direct emission matrix per process; row i belongs to the i-th hospital.
+    """
+    batches = {}
+    matrices = {}
+    direct_emissions = {}
+    for scenario_name, scen in scenarios.items():
+        segregation_efficiency = scen["segregation_efficiency"]
+        if segregation_efficiency not in batches:
+            batches[segregation_efficiency] = WasteStreamBatch.from_streams(adjusted_wastes[segregation_efficiency])
+        scenario_matrices = {}
+        for process_key, process_obj in processes.items():
+            key = (process_key, segregation_efficiency, process_obj.scenario_signature(scen))
+            if key not in matrices:
+                matrix = process_obj.calculate_direct_emission_matrix(batches[segregation_efficiency], scenario=scen)
+                matrix.setflags(write=False)
+                matrices[key] = matrix
+            scenario_matrices[process_key] = matrices[key]
+        direct_emissions[scenario_name] = scenario_matrices
+    logging.info(f"Computed {len(matrices)} distinct direct emission matrices for "
+                 f"{len(scenarios) * len(processes)} scenario-process combinations.")
+    return direct_emissions
+
+def run_scenario(
+    scenario_name: str,
+    scen: Dict[str, Any],
+    hospitals: List[Dict[str, Any]],
+    adjusted_wastes: List[WasteStream],
+    direct_emissions: Dict[str, np.ndarray],
+    flow_keys: Dict[str, Tuple[str, str]],
+    process_db_name: str,
+) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Builds the activity datasets of one scenario for every hospital and treatment process.
+    
+    This only assembles exchanges from the precomputed emissions and does not touch the Brightway2
+    project, so the caller writes every scenario's activities in one transaction.
+    
+    Args:
+        scenario_name (str): The scenario name, used in activity codes and names.
+        scen (Dict[str, Any]): The scenario parameters.
+        hospitals (List[Dict[str, Any]]): Hospitals, each with a name and waste mass in kg.
+        adjusted_wastes (List[WasteStream]): Each hospital's waste stream adjusted for this scenario's
+            segregation efficiency (see adjust_hospital_waste).
+        direct_emissions (Dict[str, np.ndarray]): The direct emission matrix of each treatment process for
+            this scenario (see compute_direct_emissions), computed by the caller so scenarios can share them.
+        flow_keys (Dict[str, Tuple[str, str]]): Biosphere flow keys keyed by emission name.
+        process_db_name (str): The name of the database the activities will be written to.
+    
+    Returns:
+        Dict[Tuple[str, str], Dict[str, Any]]: Activity datasets keyed by (database name, activity code).
+    """
+    logging.info(f"Running scenario: {scenario_name} - {scen['description']}")
+    process_data = {}
+    for h_idx, (hospital, adjusted_waste) in enumerate(zip(hospitals, adjusted_wastes)):
+        hosp_name = hospital["name"]
+        
+        # Set up the indirect emissions calculator if hospital-specific factors exist. Indirect emissions
+        # depend only on the waste stream, so the vector is computed once and shared by every process.
+        indirect_factors = config.HOSPITAL_INDIRECT_FACTORS.get(hosp_name, {})
+        indirect_vector = (
+            IndirectEmissionsCalculator(
+                indirect_factors, hospital_index=config.HOSPITAL_NAMES.index(hosp_name)
+            ).calculate_vector(adjusted_waste)
+            if indirect_factors else None
+        )
+        
+        for process_key, process_matrix in direct_emissions.items():
+            # Create a unique activity for each hospital-process-scenario combination.
+            activity_code = f"{hosp_name}_{process_key}_{scenario_name}"
+            activity_name = f"{hosp_name} {process_key} {scenario_name}"
+            
+            # Take the hospital's direct emission vector and add the indirect emissions in one step.
+            total_emissions = process_matrix[h_idx]
+            if indirect_vector is not None:
+                total_emissions = total_emissions + indirect_vector
+            
+            # Build the activity dataset (production and biosphere exchanges) from the combined emissions.
+            process_data[(process_db_name, activity_code)] = build_activity_data(
+                process_db_name, activity_code, activity_name,
+                dict(zip(config.FLOW_ORDER, total_emissions.tolist())), flow_keys
+            )
+    return process_data
 
 def main():
     # Configure logging.
@@ -36,12 +215,15 @@ def main():
     # Set up the Brightway2 project and ensure the biosphere database is loaded.
     project_name = "HospitalWasteManagement"
     bio_db = setup_project(project_name)
-    flow_index = build_flow_index(bio_db)
-    flows = retrieve_flows(flow_index)
+    flows = retrieve_flows(bio_db)
     
-    # Create or reset the Hospital Processes database.
-    process_db_name = "HospitalProcesses"
-    process_db = create_or_reset_db(process_db_name)
+    # Resolve the available LCIA methods once; categories without a method are left unscored.
+    valid_methods = {
+        category: method for category, method in config.IMPACT_CATEGORIES.items() if method in bw.methods
+    }
+    for category, method in config.IMPACT_CATEGORIES.items():
+        if category not in valid_methods:
+            logging.warning(f"LCIA method {method} not found for impact category {category}.")
     
     # Define hospitals (each with a name and waste mass in kg).
     hospitals = [
@@ -111,84 +293,99 @@ def main():
     }
     
     # Initialize treatment process classes using the corresponding emission factors.
-    processes = {
-        "INCINERATION": IncinerationProcess("Incineration", config.EMISSION_FACTORS["INCINERATION"]),
-        "LANDFILL": LandfillProcess("Landfill", config.EMISSION_FACTORS["LANDFILL"]),
-        "PYROLYSIS": PyrolysisProcess("Pyrolysis", config.EMISSION_FACTORS["PYROLYSIS"]),
-        "CHEM_DISINFECTION": ChemDisinfectionProcess("Chemical Disinfection", config.EMISSION_FACTORS.get("CHEM_DISINFECTION", {})),
-        "AUTOCLAVE": AutoclaveProcess("Autoclave", config.EMISSION_FACTORS.get("AUTOCLAVE", {})),
-        "MICROWAVE": MicrowaveProcess("Microwave", config.EMISSION_FACTORS.get("MICROWAVE", {}))
-    }
+    processes = build_processes()
     
-    # Dictionary to store results.
-    results = {}
+    # Skip processes without emission factors: they would only add empty activities and LCIA runs.
+    skipped = [key for key, process_obj in processes.items() if not process_obj.factors]
+    if skipped:
+        logging.info(f"Skipping processes without emission factors: {', '.join(skipped)}")
+        processes = {key: process_obj for key, process_obj in processes.items() if key not in skipped}
     
-    # Loop over scenarios, hospitals, and processes.
-    for scenario_name, scen in scenarios.items():
-        logging.info(f"Running scenario: {scenario_name} - {scen['description']}")
-        results[scenario_name] = {}
-        for hospital in hospitals:
-            hosp_name = hospital["name"]
-            results[scenario_name][hosp_name] = {}
-            
-            # Create a waste stream object for the hospital.
-            waste_mass = hospital["waste"] * ureg("kg")
-            waste_stream = WasteStream(mass=waste_mass)
-            adjusted_waste = waste_stream.adjust_for_segregation(scen["segregation_efficiency"])
-            
-            # Set up the indirect emissions calculator if hospital-specific factors exist.
-            indirect_factors = config.HOSPITAL_INDIRECT_FACTORS.get(hosp_name, {})
-            indirect_calc = IndirectEmissionsCalculator(indirect_factors) if indirect_factors else None
-            
-            for process_key, process_obj in processes.items():
-                # Create a unique activity for each hospital-process-scenario combination.
-                activity_code = f"{hosp_name}_{process_key}_{scenario_name}"
-                activity_name = f"{hosp_name} {process_key} {scenario_name}"
-                activity = create_activity(process_db, activity_code, activity_name)
-                add_production_exchange(activity)
-                
-                # Calculate direct emissions using the process model.
-                direct_emissions = process_obj.calculate_direct_emissions(adjusted_waste, scenario=scen)
-                
-                # Add indirect emissions if applicable.
-                if indirect_calc:
-                    indirect_emissions = indirect_calc.calculate(adjusted_waste)
-                    # Combine direct and indirect emissions.
-                    for key, val in indirect_emissions.items():
-                        if key in direct_emissions:
-                            direct_emissions[key] += val
-                        else:
-                            direct_emissions[key] = val
-                
-                # Create biosphere exchanges based on the combined emissions.
-                add_biosphere_exchanges(activity, direct_emissions, flows)
-                
-                # Compute LCIA scores for the activity for each impact category.
-                results[scenario_name][hosp_name][process_key] = {}
-                for category, method in config.IMPACT_CATEGORIES.items():
-                    if method not in bw.methods:
-                        logging.warning(f"LCIA method {method} not found for impact category {category}.")
-                        results[scenario_name][hosp_name][process_key][category] = None
-                    else:
-                        score = compute_lcia(activity, method)
-                        norm_factor = config.NORMALIZATION_FACTORS.get(category, 1)
-                        normalized = score / norm_factor if norm_factor != 0 else None
-                        results[scenario_name][hosp_name][process_key][category] = (score, normalized)
-    
-    # Export the results to a CSV file.
+    # Create or reset the Hospital Processes database. If it was already built from identical
+    # inputs, reuse it as-is and only reload its activities for the LCIA step.
+    process_db_name = "HospitalProcesses"
+    config_hash = compute_config_hash(
+        scenarios,
+        hospitals,
+        config.EMISSION_FACTORS,
+        config.HOSPITAL_INDIRECT_FACTORS,
+        config.DEFAULT_COMPOSITION,
+    )
+    reuse_db = db_matches_hash(process_db_name, config_hash)
+    process_db = create_or_reset_db(process_db_name, expected_hash=config_hash)
+    
+    # Raw LCIA scores indexed by (scenario, hospital, process, impact category).
+    # Categories whose LCIA method is unavailable are left as NaN. The scores are only reported, so
+    # single precision (about 7 significant digits) is enough and halves the array size.
+    categories = list(config.IMPACT_CATEGORIES)
+    raw = np.full((len(scenarios), len(hospitals), len(processes), len(categories)), np.nan, dtype=np.float32)
+    
+    # Activity codes for each scenario-hospital-process combination, scored together after the loop.
+    activity_codes = [
+        ((s_idx, h_idx, p_idx), f"{hospital['name']}_{process_key}_{scenario_name}")
+        for s_idx, scenario_name in enumerate(scenarios)
+        for h_idx, hospital in enumerate(hospitals)
+        for p_idx, process_key in enumerate(processes)
+    ]
+    
+    # Build the activity datasets unless the stored database already holds them. The adjusted waste
+    # streams and direct emissions are computed first, so scenarios that share them compute them once;
+    # what is left per scenario is assembling a few small dictionaries, so the scenarios run in a plain
+    # loop (a process pool costs more to start than this work takes).
+    process_data = {}
+    if not reuse_db:
+        flow_keys = {name: flow.key for name, flow in flows.items() if flow is not None}
+        adjusted_wastes = adjust_hospital_waste(scenarios, hospitals)
+        direct_emissions = compute_direct_emissions(scenarios, adjusted_wastes, processes)
+        for scenario_name, scen in scenarios.items():
+            process_data.update(run_scenario(
+                scenario_name,
+                scen,
+                hospitals,
+                adjusted_wastes[scen["segregation_efficiency"]],
+                direct_emissions[scenario_name],
+                flow_keys,
+                process_db_name,
+            ))
+    
+    # Write all activities at once and mark the database as complete for this configuration
+    # so the next run can reuse it.
+    if not reuse_db:
+        process_db.write(process_data)
+        tag_db_hash(process_db, config_hash)
+    
+    # Load the written activities in a single pass over the database.
+    activities_by_code = {activity["code"]: activity for activity in process_db}
+    activities = [(idx, activities_by_code[code]) for idx, code in activity_codes]
+    
+    # Compute LCIA scores for all activities in one batch, reusing a single factorized LCA.
+    scores = compute_lcia_batch([activity for _, activity in activities], list(valid_methods.values()))
+    
+    # Fill in the scores of the available categories; the others keep their NaN (empty) score.
+    category_methods = [(categories.index(category), method) for category, method in valid_methods.items()]
+    for (s_idx, h_idx, p_idx), activity in activities:
+        for c_idx, method in category_methods:
+            raw[s_idx, h_idx, p_idx, c_idx] = scores[(activity["code"], method)]
+    
+    # Normalize and flatten all scores in one compiled pass; a zero normalization factor yields
+    # no normalized score (NaN).
+    norm_factors = np.array([config.NORMALIZATION_FACTORS.get(category, 1) for category in categories], dtype=np.float32)
+    indices, flat_scores = flatten_norm(raw, norm_factors)
+    
+    # Export the results to a CSV file. The flattened indices are mapped back to labels.
+    scenario_names = list(scenarios)
+    hospital_names = [hospital["name"] for hospital in hospitals]
+    process_names = list(processes)
+    rows = (
+        [scenario_names[s_idx], hospital_names[h_idx], process_names[p_idx], categories[c_idx],
+         None if np.isnan(score) else float(score), None if np.isnan(normalized) else float(normalized)]
+        for (s_idx, h_idx, p_idx, c_idx), (score, normalized) in zip(indices.tolist(), flat_scores)
+    )
     output_file = Path("scenario_results.csv")
     with output_file.open("w", newline="") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["Scenario", "Hospital", "Process", "Impact Category", "Raw Score", "Normalized Score"])
-        for scenario_name, hosp_data in results.items():
-            for hosp_name, proc_data in hosp_data.items():
-                for process_key, impact_data in proc_data.items():
-                    for category, scores in impact_data.items():
-                        if scores is None:
-                            writer.writerow([scenario_name, hosp_name, process_key, category, None, None])
-                        else:
-                            raw, norm = scores
-                            writer.writerow([scenario_name, hosp_name, process_key, category, raw, norm])
+        writer.writerows(rows)
     
     logging.info(f"Scenario results exported to {output_file}")
 
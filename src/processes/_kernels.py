@@ -0,0 +1,186 @@
+# HospitalWasteManagement/src/processes/_kernels.py
+
+"""
+Numeric cores of the treatment process calculations.
+
+Each kernel takes plain floats (masses in kg, composition fractions and emission factors) and returns a
+tuple of emission amounts in kg. The process classes unpack their factors, call the kernel and build the
+emissions dictionary. The kernels are compiled with Numba when it is installed (see src/jit.py).
+
+The kernels only use element-wise arithmetic on the waste arguments, so they also accept NumPy arrays
+(one element per waste stream) for the batched calculations.
+
+Each kernel is declared with explicit signatures (see _signatures), so Numba compiles it eagerly when the
+module is imported and stores the machine code in its on-disk cache; later runs load it from the cache
+instead of compiling on the first call.
+
+The kernels are compiled with fastmath, which lets LLVM reorder and fuse the floating-point operations
+(differently for the scalar and the vectorized array variants). Compiled results, batched or not, can
+therefore differ from each other and from the plain Python results in the last bits (relative differences
+of about 1e-15); compare them with a relative tolerance rather than for equality.
+"""
+
+from src.jit import njit
+
+# Mass ratios of CO2 to carbon and of SO2 to sulphur (molar masses in g/mol).
+_CO2_C_RATIO = 44.0 / 12.0
+_SO2_S_RATIO = 64.0 / 32.0
+
+def _signatures(n_waste, n_factors, n_out):
+    """
+    Returns the Numba signatures of a process kernel.
+
+    Args:
+        n_waste (int): The number of leading waste arguments (mass and composition fractions).
+        n_factors (int): The number of trailing factor arguments (always scalars).
+        n_out (int): The number of emissions the kernel returns.
+
+    Returns:
+        list: Two signatures, one with scalar waste arguments and one with 1-D array waste arguments
+              (the batched calculations); the emissions have the type of the waste arguments.
+    """
+    signatures = []
+    for waste_type in ("float64", "float64[:]"):
+        args = ", ".join([waste_type] * n_waste + ["float64"] * n_factors)
+        signatures.append(f"UniTuple({waste_type}, {n_out})({args})")
+    return signatures
+
+@njit(_signatures(5, 9, 8), cache=True, fastmath=True, error_model="numpy")
+def _incineration_core(mass, total_organic, fossil_organic, mercury, heavy_metals,
+                       carbon_content_fossil, carbon_content_biogenic, so2_conversion, nox_per_waste,
+                       pm10_per_organic, pm25_per_organic, hg_volatilization, pb_volatilization,
+                       combustion_efficiency):
+    """
+    Incineration emissions.
+
+    Returns:
+        tuple: (co2_fossil, co2_biogenic, so2, nox, pm10, pm25, hg, pb) in kg.
+    """
+    # Organic mass (kg), shared by the organic-driven emissions.
+    organic_mass = mass * total_organic
+    biogenic_organic = total_organic - fossil_organic
+    co2_fossil = fossil_organic * mass * carbon_content_fossil * _CO2_C_RATIO
+    co2_biogenic = biogenic_organic * mass * carbon_content_biogenic * _CO2_C_RATIO
+    so2 = organic_mass * so2_conversion * _SO2_S_RATIO
+    nox = mass * nox_per_waste
+    pm10 = organic_mass * pm10_per_organic
+    pm25 = organic_mass * pm25_per_organic
+    hg = mass * mercury * hg_volatilization
+    pb = mass * heavy_metals * pb_volatilization
+
+    # If combustion efficiency is below a threshold (0.95), apply a penalty to PM emissions.
+    if combustion_efficiency < 0.95:
+        penalty = (0.95 - combustion_efficiency) * 2
+        pm10 = pm10 * (1 + penalty)
+        pm25 = pm25 * (1 + penalty)
+    return co2_fossil, co2_biogenic, so2, nox, pm10, pm25, hg, pb
+
+@njit(_signatures(5, 9, 6), cache=True, fastmath=True, error_model="numpy")
+def _landfill_core(mass, biodeg_frac, slow_frac, mercury, heavy_metals, t, fast_decayed, slow_decayed,
+                   ch4_split, co2_split, nh3_split, nmvoc_split, hg_factor, pb_factor):
+    """
+    Landfill emissions over the time period t.
+
+    fast_decayed and slow_decayed are the fractions of the fast and slow biodegradable organics that
+    have decayed over the time period (they only depend on the factors, so the caller computes them once).
+
+    Returns:
+        tuple: (ch4_biogenic, co2_biogenic, hg, pb, nmvoc, nh3) in kg.
+    """
+    # Calculate emissions for each pollutant.
+    ch4_biogenic = mass * biodeg_frac * fast_decayed * ch4_split
+    co2_biogenic = mass * (biodeg_frac * fast_decayed * co2_split +
+                           slow_frac * slow_decayed * 0.1)
+    nh3_emission = mass * biodeg_frac * fast_decayed * nh3_split
+    nmvoc_emission = mass * (biodeg_frac * fast_decayed * nmvoc_split +
+                             slow_frac * slow_decayed * nmvoc_split * 0.5)
+    hg_emission = mass * mercury * hg_factor * t
+    pb_emission = mass * heavy_metals * pb_factor * t
+    return ch4_biogenic, co2_biogenic, hg_emission, pb_emission, nmvoc_emission, nh3_emission
+
+@njit(_signatures(5, 7, 7), cache=True, fastmath=True, error_model="numpy")
+def _pyrolysis_core(mass, total_organic, total_chlor, mercury, heavy_metals,
+                    co2_fossil_per_organic, ch4_fossil_per_organic, nmvoc_per_organic, pahs_per_organic,
+                    dioxin_per_chlorinated, hg_per_mercury, pb_per_heavy_metal):
+    """
+    Pyrolysis emissions.
+
+    Returns:
+        tuple: (co2_fossil, ch4_fossil, nmvoc, pahs, dioxin, hg, pb) in kg.
+    """
+    organic_mass = mass * total_organic
+    co2_fossil = organic_mass * co2_fossil_per_organic
+    ch4_fossil = organic_mass * ch4_fossil_per_organic
+    nmvoc = organic_mass * nmvoc_per_organic
+    pahs = organic_mass * pahs_per_organic
+    dioxin = mass * total_chlor * dioxin_per_chlorinated
+    hg = mass * mercury * hg_per_mercury
+    pb = mass * heavy_metals * pb_per_heavy_metal
+    return co2_fossil, ch4_fossil, nmvoc, pahs, dioxin, hg, pb
+
+@njit(_signatures(2, 8, 4), cache=True, fastmath=True, error_model="numpy")
+def _chem_disinfection_core(mass, org_sum, chem_fraction, disinfectant_ratio, chlorine_loss,
+                            chlorine_to_hcl_split, nitrogen_content, nitrogen_to_nh3,
+                            nmvoc_per_organic, pm10_per_organic):
+    """
+    Chemical disinfection emissions.
+
+    Returns:
+        tuple: (chlorine_air, nmvoc, nh3, pm10) in kg.
+    """
+    # Total treatable organic mass (in kg) and the disinfectant used on it.
+    total_organic = org_sum * mass * chem_fraction
+    disinfectant_used = total_organic * disinfectant_ratio
+
+    cl2_emission = disinfectant_used * chlorine_loss * (1 - chlorine_to_hcl_split)
+    nh3_emission = total_organic * nitrogen_content * nitrogen_to_nh3
+    nmvoc_emission = total_organic * nmvoc_per_organic
+    pm10_emission = total_organic * pm10_per_organic
+    return cl2_emission, nmvoc_emission, nh3_emission, pm10_emission
+
+@njit(_signatures(3, 8, 5), cache=True, fastmath=True, error_model="numpy")
+def _autoclave_core(mass, total_organic, mercury, elec_per_waste, grid_co2_factor,
+                    nmvoc_per_organic, pm10_per_organic, pm25_per_organic, hg_leach_factor,
+                    temp_diff, nmvoc_temp_coeff):
+    """
+    Autoclave emissions.
+
+    Returns:
+        tuple: (nmvoc, pm10, pm25, co2_fossil, hg) in kg.
+    """
+    # Temperature difference factor for NMVOC emissions (at least 1): 1 + max(increase, 0), with the
+    # clamp written as (x + |x|) / 2 so it compiles without a branch.
+    nmvoc_increase = (temp_diff / 10) * nmvoc_temp_coeff
+    nmvoc_factor = 1.0 + (nmvoc_increase + abs(nmvoc_increase)) * 0.5
+
+    organic_mass = mass * total_organic
+    nmvoc = organic_mass * nmvoc_per_organic * nmvoc_factor
+    pm10 = organic_mass * pm10_per_organic
+    pm25 = organic_mass * pm25_per_organic
+    energy_co2 = mass * elec_per_waste * grid_co2_factor
+    hg = mass * mercury * hg_leach_factor
+    return nmvoc, pm10, pm25, energy_co2, hg
+
+@njit(_signatures(4, 9, 5), cache=True, fastmath=True, error_model="numpy")
+def _microwave_core(mass, total_organic, plastic_frac, heavy_metals,
+                    nmvoc_per_organic, pm10_per_organic, pm25_per_organic,
+                    freq_diff, freq_impact_per_mhz, plastic_nmvoc_boost,
+                    elec_per_waste, grid_co2_factor, metal_aerosol_factor):
+    """
+    Microwave emissions before the emission limits are applied.
+
+    Returns:
+        tuple: (nmvoc, pm10, pm25, co2_fossil, pb) in kg.
+    """
+    # Only a frequency below the base frequency raises the emissions; max(freq_diff, 0) is written as
+    # (x + |x|) / 2 so it compiles without a branch.
+    freq_multiplier = 1 + ((freq_diff + abs(freq_diff)) * 0.5) * freq_impact_per_mhz
+    plastic_boost = 1 + plastic_frac * plastic_nmvoc_boost
+
+    organic_mass = mass * total_organic
+    raw_nmvoc = organic_mass * nmvoc_per_organic * freq_multiplier * plastic_boost
+    raw_pm10 = organic_mass * pm10_per_organic * freq_multiplier
+    raw_pm25 = organic_mass * pm25_per_organic * freq_multiplier
+    energy_co2 = mass * elec_per_waste * grid_co2_factor
+    metal_emissions = mass * heavy_metals * metal_aerosol_factor
+    return raw_nmvoc, raw_pm10, raw_pm25, energy_co2, metal_emissions
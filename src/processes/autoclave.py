@@ -1,10 +1,11 @@
 # HospitalWasteManagement/src/processes/autoclave.py
 
-import pint
+from collections import namedtuple
 from src.processes.base import TreatmentProcess
+from src.processes._kernels import _autoclave_core
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# The direct emissions of the process (in kg), in the order returned by its numeric core.
+AutoclaveEmissions = namedtuple("AutoclaveEmissions", ("nmvoc", "pm10", "pm25", "co2_fossil", "hg"))
 
 class AutoclaveProcess(TreatmentProcess):
     """
@@ -38,32 +39,18 @@ class AutoclaveProcess(TreatmentProcess):
             "hg_leach_factor": 0.001
         }
     """
-    def calculate_direct_emissions(self, waste, scenario: dict = None) -> dict:
-        # Use the provided autoclave factors.
-        f = self.factors
-
-        # Retrieve the organic fraction from the waste composition.
-        comp_org = waste.composition["organic_materials"]
-        total_organic = sum(comp_org.values())
-
-        # Calculate the temperature difference factor for NMVOC emissions.
-        temp_diff = f["operating_temp"] - f["baseline_temp"]
-        nmvoc_factor = 1 + (temp_diff / 10) * f["nmvoc_temp_coeff"]
-        nmvoc_factor = max(nmvoc_factor, 1.0)  # Ensure at least a factor of 1.
-
-        # Convert waste mass to kilograms.
-        mass = waste.mass.to("kg").magnitude
-
-        # Calculate CO2 emissions from grid electricity usage.
-        energy_co2 = mass * f["elec_per_waste"] * f["grid_co2_factor"]
-
-        # Compute the emissions for each pollutant.
-        emissions = {
-            "nmvoc": mass * total_organic * f["nmvoc_per_organic"] * nmvoc_factor * ureg("kg"),
-            "pm10": mass * total_organic * f["pm10_per_organic"] * ureg("kg"),
-            "pm25": mass * total_organic * f["pm25_per_organic"] * ureg("kg"),
-            "co2_fossil": energy_co2 * ureg("kg"),
-            "hg": mass * waste.composition["metallic_materials"].get("mercury_waste", 0) * f["hg_leach_factor"] * ureg("kg"),
-        }
-        
-        return emissions
+    scenario_keys = ()
+    emission_keys = AutoclaveEmissions._fields
+    factor_keys = ("nmvoc_per_organic", "pm10_per_organic", "pm25_per_organic", "elec_per_waste",
+                   "grid_co2_factor", "baseline_temp", "operating_temp", "nmvoc_temp_coeff",
+                   "hg_leach_factor")
+    __slots__ = factor_keys
+
+    def calculate_emission_result(self, waste, scenario: dict = None) -> AutoclaveEmissions:
+        # Calculate the emissions with the numeric core (waste mass in kg, cached composition totals). The
+        # NMVOC emissions grow with the difference between the operating and baseline temperatures.
+        return AutoclaveEmissions(*_autoclave_core(
+            waste.mass_kg, waste.total_organic, waste.mercury, self.elec_per_waste, self.grid_co2_factor,
+            self.nmvoc_per_organic, self.pm10_per_organic, self.pm25_per_organic, self.hg_leach_factor,
+            self.operating_temp - self.baseline_temp, self.nmvoc_temp_coeff,
+        ))
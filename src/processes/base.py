@@ -1,29 +1,58 @@
 # HospitalWasteManagement/src/processes/base.py
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional, Tuple
+import numpy as np
 import pint
-
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+from src import config
+from src.units import pintify
 
 class TreatmentProcess(ABC):
     """
     Base class for treatment processes in the Hospital Waste Management LCA framework.
     
     Each treatment process should inherit from this class and implement the
-    calculate_direct_emissions method, which computes the process-specific direct emissions
-    for a given waste stream and scenario.
+    calculate_emission_result method, which computes the process-specific direct emissions
+    for a given waste stream and scenario as a named tuple of plain floats in kg. The calculations
+    stay free of Pint; calculate_direct_emissions attaches the units once for callers that need quantities.
     
     Attributes:
         name (str): The name of the treatment process.
         factors (Dict[str, Any]): A dictionary containing process-specific factors (e.g., emission factors).
+        scenario_keys (Optional[Tuple[str, ...]]): The scenario parameters the emission calculation reads.
+            None (the default) means the process may read any scenario parameter.
+        emission_keys (Tuple[str, ...]): The emissions the process calculates, in the order of the fields of
+            its emission result. A waste stream without mass yields zero for each of them without running
+            the calculation.
+        factor_keys (Tuple[str, ...]): The factors the emission calculation reads. Each one is bound to an
+            attribute of the same name when the process is created, so the calculation reads attributes
+            instead of looking the factors up by key on every call. Subclasses list them in __slots__.
+        factor_defaults (Dict[str, Any]): Values for optional factors missing from the factor dictionary.
     """
+    scenario_keys: Optional[Tuple[str, ...]] = None
+    emission_keys: Tuple[str, ...] = ()
+    factor_keys: Tuple[str, ...] = ()
+    factor_defaults: Dict[str, Any] = {}
+    __slots__ = ("name", "factors", "_flow_columns")
+
     def __init__(self, name: str, factors: Dict[str, Any]):
         self.name = name
         self.factors = factors
+        # The flow index (see config.FLOW_ORDER) of each emission, for building emission vectors.
+        self._flow_columns = np.array([config.FLOW_INDEX[key] for key in self.emission_keys], dtype=np.intp)
+        self._bind_factors()
+
+    def _bind_factors(self):
+        """
+        Binds each factor listed in factor_keys to an attribute of the same name.
+        
+        Missing factors fall back to factor_defaults, or None, so a process without configured
+        factors can still be created (it is skipped by the model run).
+        """
+        for key in self.factor_keys:
+            setattr(self, key, self.factors.get(key, self.factor_defaults.get(key)))
 
     @abstractmethod
-    def calculate_direct_emissions(self, waste, scenario: Dict[str, Any] = None) -> Dict[str, pint.Quantity]:
+    def calculate_emission_result(self, waste, scenario: Dict[str, Any] = None) -> tuple:
         """
         Calculate the direct emissions for this treatment process given a waste stream and an optional scenario.
         
@@ -33,7 +62,153 @@ class TreatmentProcess(ABC):
             scenario (Dict[str, Any], optional): A dictionary of scenario parameters that may modify emission factors.
         
         Returns:
-            Dict[str, pint.Quantity]: A dictionary mapping emission keys (e.g., 'co2_fossil', 'so2') to their calculated amounts
-                                      as Pint quantities.
+            tuple: A named tuple whose fields are the process's emission_keys (e.g., 'co2_fossil', 'so2'), holding
+                   the calculated amounts in kg.
         """
         pass
+
+    def calculate_direct_magnitudes(self, waste, scenario: Dict[str, Any] = None) -> Dict[str, float]:
+        """
+        Calculate the direct emissions as plain amounts keyed by emission name.
+        
+        Args:
+            waste: An object representing the waste stream.
+            scenario (Dict[str, Any], optional): A dictionary of scenario parameters that may modify emission factors.
+        
+        Returns:
+            Dict[str, float]: A dictionary mapping emission keys (e.g., 'co2_fossil', 'so2') to their calculated amounts
+                              in kg.
+        """
+        return dict(zip(self.emission_keys, self.calculate_emission_result(waste, scenario=scenario)))
+
+    def calculate_direct_emissions(self, waste, scenario: Dict[str, Any] = None,
+                                   return_magnitudes: bool = False) -> Dict[str, Any]:
+        """
+        Calculate the direct emissions as Pint quantities.
+        
+        Args:
+            waste: An object representing the waste stream.
+            scenario (Dict[str, Any], optional): A dictionary of scenario parameters that may modify emission factors.
+            return_magnitudes (bool, optional): If True, return the plain amounts in kg instead of quantities, for
+                                                callers that keep computing on floats.
+        
+        Returns:
+            Dict[str, Any]: A dictionary mapping emission keys to their calculated amounts as Pint quantities (kg),
+                            or as floats in kg if return_magnitudes is True.
+        """
+        if waste.mass_kg == 0.0:
+            # Every emission scales with the waste mass, so an empty stream emits nothing.
+            magnitudes = dict.fromkeys(self.emission_keys, 0.0)
+        else:
+            magnitudes = self.calculate_direct_magnitudes(waste, scenario=scenario)
+        return magnitudes if return_magnitudes else pintify(magnitudes)
+
+    def calculate_direct_magnitudes_batch(self, batch, scenario: Dict[str, Any] = None) -> Dict[str, np.ndarray]:
+        """
+        Calculate the direct emissions of a batch of waste streams as arrays in kg.
+        
+        The default implementation evaluates calculate_emission_result once with the batch in place of a
+        single waste stream, so each emission is computed with one array expression for the whole batch.
+        Processes whose calculation branches on the waste composition override this method.
+        
+        Args:
+            batch: A WasteStreamBatch holding the waste streams.
+            scenario (Dict[str, Any], optional): A dictionary of scenario parameters that may modify emission factors.
+        
+        Returns:
+            Dict[str, np.ndarray]: A dictionary mapping emission keys to float64 arrays with one amount (kg)
+                                   per waste stream.
+        """
+        shape = batch.mass_kg.shape
+        return {
+            key: np.broadcast_to(np.asarray(value, dtype=np.float64), shape).copy()
+            for key, value in zip(self.emission_keys, self.calculate_emission_result(batch, scenario=scenario))
+        }
+
+    def calculate_direct_emissions_batch(self, batch, scenario: Dict[str, Any] = None) -> Dict[str, pint.Quantity]:
+        """
+        Calculate the direct emissions of a batch of waste streams as array-valued Pint quantities.
+        
+        Args:
+            batch: A WasteStreamBatch holding the waste streams.
+            scenario (Dict[str, Any], optional): A dictionary of scenario parameters that may modify emission factors.
+        
+        Returns:
+            Dict[str, pint.Quantity]: A dictionary mapping emission keys to quantities (kg) wrapping one array each.
+        """
+        return pintify(self.calculate_direct_magnitudes_batch(batch, scenario=scenario))
+
+    def scenario_signature(self, scenario: Dict[str, Any] = None) -> tuple:
+        """
+        Returns a hashable summary of the scenario parameters that affect this process.
+        
+        Two scenarios with the same signature yield the same direct emissions for the same waste stream,
+        so the signature can be used as a cache key.
+        
+        Args:
+            scenario (Dict[str, Any], optional): A dictionary of scenario parameters.
+        
+        Returns:
+            tuple: (key, value) pairs of the relevant scenario parameters, sorted by key.
+        """
+        if not scenario:
+            return ()
+        if self.scenario_keys is None:
+            return tuple(sorted(scenario.items()))
+        return tuple((key, scenario[key]) for key in sorted(self.scenario_keys) if key in scenario)
+
+    def calculate_direct_emission_vector(self, waste, scenario: Dict[str, Any] = None,
+                                         flow_index: Optional[Mapping[str, int]] = None) -> np.ndarray:
+        """
+        Calculate the direct emissions as a flow vector ordered like config.FLOW_ORDER.
+        
+        Vectors from different sources (e.g., direct and indirect emissions) can be combined with a
+        single array addition instead of merging dictionaries key by key.
+        
+        Args:
+            waste: An object representing the waste stream.
+            scenario (Dict[str, Any], optional): A dictionary of scenario parameters.
+            flow_index (Mapping[str, int], optional): The row of each emission in another flow ordering, e.g.
+                the biosphere rows of an LCA matrix. It must cover every emission key of the process; the
+                vector then has len(flow_index) entries. Defaults to config.FLOW_INDEX.
+        
+        Returns:
+            np.ndarray: A float64 array with one entry per flow holding each emission in kg
+                        (flows the process does not emit are zero).
+        
+        Raises:
+            KeyError: If flow_index has no row for one of the process's emissions.
+        """
+        if flow_index is None:
+            n_flows, columns = len(config.FLOW_ORDER), self._flow_columns
+        else:
+            n_flows = len(flow_index)
+            columns = np.array([flow_index[key] for key in self.emission_keys], dtype=np.intp)
+        vector = np.zeros(n_flows, dtype=np.float64)
+        if waste.mass_kg == 0.0:
+            # Every emission scales with the waste mass, so an empty stream emits nothing.
+            return vector
+        # All direct emissions are expressed in kg.
+        vector[columns] = self.calculate_emission_result(waste, scenario=scenario)
+        return vector
+
+    def calculate_direct_emission_matrix(self, batch, scenario: Dict[str, Any] = None) -> np.ndarray:
+        """
+        Calculate the direct emissions of a batch of waste streams as a flow matrix.
+        
+        This is the batched counterpart of calculate_direct_emission_vector: row i holds the emission
+        vector of the batch's i-th waste stream, ordered like config.FLOW_ORDER.
+        
+        Args:
+            batch: A WasteStreamBatch holding the waste streams.
+            scenario (Dict[str, Any], optional): A dictionary of scenario parameters.
+        
+        Returns:
+            np.ndarray: A float64 array of shape (len(batch), len(config.FLOW_ORDER)) holding the emissions in kg.
+        """
+        magnitudes = self.calculate_direct_magnitudes_batch(batch, scenario=scenario)
+        matrix = np.zeros((len(batch.mass_kg), len(config.FLOW_ORDER)), dtype=np.float64)
+        if self.emission_keys:
+            # Place each emission's array in its flow column with one fancy-indexed assignment.
+            matrix[:, self._flow_columns] = np.column_stack([magnitudes[key] for key in self.emission_keys])
+        return matrix
@@ -1,11 +1,11 @@
 # HospitalWasteManagement/src/processes/chem_disinfection.py
 
-import copy
-import pint
+from collections import namedtuple
 from src.processes.base import TreatmentProcess
+from src.processes._kernels import _chem_disinfection_core
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# The direct emissions of the process (in kg), in the order returned by its numeric core.
+ChemDisinfectionEmissions = namedtuple("ChemDisinfectionEmissions", ("chlorine_air", "nmvoc", "nh3", "pm10"))
 
 class ChemDisinfectionProcess(TreatmentProcess):
     """
@@ -27,45 +27,22 @@ class ChemDisinfectionProcess(TreatmentProcess):
       5. Compute the nitrogen content from the total organic mass and convert it to NH3 using a conversion factor.
       6. Compute NMVOC and PM10 emissions as the product of the total organic mass and their respective emission factors.
     
-    All computed emission values are returned as Pint quantities.
+    All computed emission values are in kilograms.
     """
-    def calculate_direct_emissions(self, waste, scenario: dict = None) -> dict:
-        # Work on a copy of the emission factors to avoid modifying the original.
-        f = copy.deepcopy(self.factors)
-        
+    scenario_keys = ("chemical_disinfection_fraction",)
+    emission_keys = ChemDisinfectionEmissions._fields
+    factor_keys = ("disinfectant_ratio", "chlorine_loss", "chlorine_to_hcl_split", "nitrogen_content",
+                   "nitrogen_to_nh3", "nmvoc_per_organic", "pm10_per_organic")
+    __slots__ = factor_keys
+
+    def calculate_emission_result(self, waste, scenario: dict = None) -> ChemDisinfectionEmissions:
         # Retrieve the chemical disinfection fraction from the scenario, defaulting to 1.0 if not provided.
         chem_fraction = scenario.get("chemical_disinfection_fraction", 1.0) if scenario else 1.0
         
-        # Retrieve the organic waste composition.
-        comp_org = waste.composition["organic_materials"]
-        org_sum = sum(comp_org.values())
-        
-        # Convert waste mass to kilograms.
-        mass = waste.mass.to("kg").magnitude
-        
-        # Calculate the total treatable organic mass (in kg).
-        total_organic = org_sum * mass * chem_fraction
-        
-        # Compute the amount of disinfectant used (assumed to be proportional to the treatable organic mass).
-        disinfectant_used = total_organic * f["disinfectant_ratio"]
-        
-        # Calculate chlorine emissions (to air) from the loss of chlorine in the disinfectant.
-        cl2_emission = disinfectant_used * f["chlorine_loss"] * (1 - f["chlorine_to_hcl_split"])
-        
-        # Calculate nitrogen-based emissions: determine the nitrogen content and convert it to NH3.
-        nitrogen_content = total_organic * f["nitrogen_content"]
-        nh3_emission = nitrogen_content * f["nitrogen_to_nh3"]
-        
-        # Calculate emissions for NMVOC and PM10 based on the treatable organic mass.
-        nmvoc_emission = total_organic * f["nmvoc_per_organic"]
-        pm10_emission = total_organic * f["pm10_per_organic"]
-        
-        # Construct the emissions dictionary (with units attached via Pint).
-        emissions = {
-            "chlorine_air": cl2_emission * ureg("kg"),
-            "nmvoc": nmvoc_emission * ureg("kg"),
-            "nh3": nh3_emission * ureg("kg"),
-            "pm10": pm10_emission * ureg("kg"),
-        }
-        
-        return emissions
+        # Calculate emissions with the numeric core. The treatable organic mass (in kg) is the organic
+        # fraction of the waste mass scaled by the chemical disinfection fraction.
+        return ChemDisinfectionEmissions(*_chem_disinfection_core(
+            waste.mass_kg, waste.total_organic, chem_fraction, self.disinfectant_ratio, self.chlorine_loss,
+            self.chlorine_to_hcl_split, self.nitrogen_content, self.nitrogen_to_nh3,
+            self.nmvoc_per_organic, self.pm10_per_organic,
+        ))
@@ -1,11 +1,11 @@
 # HospitalWasteManagement/src/processes/incineration.py
 
-import copy
-import pint
+from collections import namedtuple
 from src.processes.base import TreatmentProcess
+from src.processes._kernels import _incineration_core
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# The direct emissions of the process (in kg), in the order returned by its numeric core.
+IncinerationEmissions = namedtuple("IncinerationEmissions", ("co2_fossil", "co2_biogenic", "so2", "nox", "pm10", "pm25", "hg", "pb"))
 
 class IncinerationProcess(TreatmentProcess):
     """
@@ -26,42 +26,25 @@ class IncinerationProcess(TreatmentProcess):
       If a scenario dictionary is provided and contains an "incineration_flue_gas_efficiency" key,
       the factors for PM10, PM25, and NOx are scaled to reflect improvements from flue-gas cleaning.
     """
-    def calculate_direct_emissions(self, waste, scenario: dict = None) -> dict:
-        # Work on a copy of the process factors so as not to modify the original configuration.
-        f = copy.deepcopy(self.factors)
-        
+    scenario_keys = ("incineration_flue_gas_efficiency",)
+    emission_keys = IncinerationEmissions._fields
+    factor_keys = ("carbon_content_fossil", "carbon_content_biogenic", "so2_conversion", "nox_per_waste",
+                   "pm10_per_organic", "pm25_per_organic", "hg_volatilization", "pb_volatilization",
+                   "combustion_efficiency")
+    factor_defaults = {"combustion_efficiency": 1.0}
+    __slots__ = factor_keys
+
+    def calculate_emission_result(self, waste, scenario: dict = None) -> IncinerationEmissions:
         # Apply scenario adjustments to account for flue gas cleaning efficiency.
-        if scenario and "incineration_flue_gas_efficiency" in scenario:
-            efficiency = scenario["incineration_flue_gas_efficiency"]
-            f["pm10_per_organic"] *= (1 - efficiency)
-            f["pm25_per_organic"] *= (1 - efficiency)
-            f["nox_per_waste"] *= (1 - efficiency)
-        
-        # Retrieve the organic composition from the waste.
-        comp = waste.composition["organic_materials"]
-        total_organic = sum(comp.values())
-        fossil_organic = comp.get("needles_sharps_plastic", 0)
-        biogenic_organic = total_organic - fossil_organic
-        
-        # Convert waste mass to kilograms (assumed units).
-        mass = waste.mass.to("kg").magnitude
-        
-        # Calculate emissions using the provided factors.
-        emissions = {
-            "co2_fossil": fossil_organic * mass * f["carbon_content_fossil"] * (44 / 12) * ureg("kg"),
-            "co2_biogenic": biogenic_organic * mass * f["carbon_content_biogenic"] * (44 / 12) * ureg("kg"),
-            "so2": total_organic * mass * f["so2_conversion"] * (64 / 32) * ureg("kg"),
-            "nox": mass * f["nox_per_waste"] * ureg("kg"),
-            "pm10": mass * total_organic * f["pm10_per_organic"] * ureg("kg"),
-            "pm25": mass * total_organic * f["pm25_per_organic"] * ureg("kg"),
-            "hg": mass * waste.composition["metallic_materials"].get("mercury_waste", 0) * f["hg_volatilization"] * ureg("kg"),
-            "pb": mass * waste.composition["metallic_materials"].get("other_heavy_metals", 0) * f["pb_volatilization"] * ureg("kg"),
-        }
-        
-        # If combustion efficiency is below a threshold (0.95), apply a penalty to PM emissions.
-        if f.get("combustion_efficiency", 1.0) < 0.95:
-            penalty = (0.95 - f["combustion_efficiency"]) * 2
-            emissions["pm10"] *= (1 + penalty)
-            emissions["pm25"] *= (1 + penalty)
+        efficiency = scenario.get("incineration_flue_gas_efficiency", 0.0) if scenario else 0.0
+        pm10_per_organic = self.pm10_per_organic * (1 - efficiency)
+        pm25_per_organic = self.pm25_per_organic * (1 - efficiency)
+        nox_per_waste = self.nox_per_waste * (1 - efficiency)
         
-        return emissions
+        # Calculate emissions with the numeric core (waste mass in kg, cached composition totals).
+        return IncinerationEmissions(*_incineration_core(
+            waste.mass_kg, waste.total_organic, waste.fossil_organic, waste.mercury, waste.heavy_metals,
+            self.carbon_content_fossil, self.carbon_content_biogenic, self.so2_conversion, nox_per_waste,
+            pm10_per_organic, pm25_per_organic, self.hg_volatilization, self.pb_volatilization,
+            self.combustion_efficiency,
+        ))
@@ -1,12 +1,13 @@
 # HospitalWasteManagement/src/processes/landfill.py
 
-import copy
 import math
-import pint
+import numpy as np
+from collections import namedtuple
 from src.processes.base import TreatmentProcess
+from src.processes._kernels import _landfill_core
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# The direct emissions of the process (in kg), in the order returned by its numeric core.
+LandfillEmissions = namedtuple("LandfillEmissions", ("ch4_biogenic", "co2_biogenic", "hg", "pb", "nmvoc", "nh3"))
 
 class LandfillProcess(TreatmentProcess):
     """
@@ -25,49 +26,42 @@ class LandfillProcess(TreatmentProcess):
       - Some factors (e.g., ch4_split, hg_factor) may be modified based on a scenario,
         such as the implementation of best landfill practices.
     """
-    def calculate_direct_emissions(self, waste, scenario: dict = None) -> dict:
-        # Create a copy of the emission factors to avoid modifying the original.
-        f = copy.deepcopy(self.factors)
-        
+    scenario_keys = ("landfill_best_practices",)
+    emission_keys = LandfillEmissions._fields
+    factor_keys = ("time_period", "fast_decay_rate", "slow_decay_rate", "ch4_split", "co2_split",
+                   "nh3_split", "nmvoc_split", "hg_factor", "pb_factor")
+    __slots__ = factor_keys + ("fast_decayed", "slow_decayed")
+
+    def _bind_factors(self):
+        super()._bind_factors()
+        # The decayed fractions over the time period (1 - exp(-k * t)) only depend on the factors, so
+        # they are computed once here instead of on every call.
+        if None in (self.time_period, self.fast_decay_rate, self.slow_decay_rate):
+            self.fast_decayed = self.slow_decayed = None
+        else:
+            self.fast_decayed = 1 - math.exp(-self.fast_decay_rate * self.time_period)
+            self.slow_decayed = 1 - math.exp(-self.slow_decay_rate * self.time_period)
+
+    def calculate_emission_result(self, waste, scenario: dict = None) -> LandfillEmissions:
         # If the scenario indicates best practices for landfill, adjust the factors.
-        if scenario and scenario.get("landfill_best_practices", False):
-            f["ch4_split"] *= 0.8  # Reduce the methane split by 20%
-            f["hg_factor"] *= 0.5  # Halve the mercury emission factor
-        
-        # Extract the time period and decay rates from the factors.
-        t = f["time_period"]
-        k_fast = f["fast_decay_rate"]
-        k_slow = f["slow_decay_rate"]
+        best_practices = bool(scenario and scenario.get("landfill_best_practices", False))
+        ch4_split = self.ch4_split * (0.8 if best_practices else 1.0)  # Reduce the methane split by 20%
+        hg_factor = self.hg_factor * (0.5 if best_practices else 1.0)  # Halve the mercury emission factor
         
         # Retrieve the organic waste fractions from the waste composition.
         comp_org = waste.composition["organic_materials"]
+        # A missing material has a fraction of 0, of the same type as the mass (an array for a batch), since
+        # the compiled core does not accept a mix of scalar and array waste arguments.
+        zero = np.zeros_like(waste.mass_kg) if isinstance(waste.mass_kg, np.ndarray) else 0.0
         # Assume that body_fluids and lab_cultures biodegrade faster.
-        biodeg_frac = comp_org.get("body_fluids", 0) + comp_org.get("lab_cultures", 0)
+        biodeg_frac = comp_org.get("body_fluids", zero) + comp_org.get("lab_cultures", zero)
         # Assume that needles/sharps plastic and pharmaceuticals are less biodegradable.
-        slow_frac = comp_org.get("needles_sharps_plastic", 0) + comp_org.get("pharmaceuticals", 0)
-        
-        # Calculate the fraction of organics that have decayed over the time period.
-        fast_decayed = 1 - math.exp(-k_fast * t)
-        slow_decayed = 1 - math.exp(-k_slow * t)
-        
-        # Convert the waste mass to kilograms.
-        mass = waste.mass.to("kg").magnitude
-        
-        # Calculate emissions for each pollutant.
-        ch4_biogenic = mass * biodeg_frac * fast_decayed * f["ch4_split"]
-        co2_biogenic = mass * (biodeg_frac * fast_decayed * f["co2_split"] +
-                               slow_frac * slow_decayed * 0.1)
-        nh3_emission = mass * biodeg_frac * fast_decayed * f["nh3_split"]
-        nmvoc_emission = mass * (biodeg_frac * fast_decayed * f["nmvoc_split"] +
-                                 slow_frac * slow_decayed * f["nmvoc_split"] * 0.5)
-        
-        emissions = {
-            "ch4_biogenic": ch4_biogenic * ureg("kg"),
-            "co2_biogenic": co2_biogenic * ureg("kg"),
-            "hg": mass * waste.composition["metallic_materials"].get("mercury_waste", 0) * f["hg_factor"] * t * ureg("kg"),
-            "pb": mass * waste.composition["metallic_materials"].get("other_heavy_metals", 0) * f["pb_factor"] * t * ureg("kg"),
-            "nmvoc": nmvoc_emission * ureg("kg"),
-            "nh3": nh3_emission * ureg("kg"),
-        }
+        slow_frac = comp_org.get("needles_sharps_plastic", zero) + comp_org.get("pharmaceuticals", zero)
         
-        return emissions
+        # Calculate emissions for each pollutant with the numeric core (waste mass in kg, time period and
+        # decayed fractions precomputed from the factors).
+        return LandfillEmissions(*_landfill_core(
+            waste.mass_kg, biodeg_frac, slow_frac, waste.mercury, waste.heavy_metals,
+            self.time_period, self.fast_decayed, self.slow_decayed,
+            ch4_split, self.co2_split, self.nh3_split, self.nmvoc_split, hg_factor, self.pb_factor,
+        ))
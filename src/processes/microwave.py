@@ -1,11 +1,12 @@
 # HospitalWasteManagement/src/processes/microwave.py
 
-import copy
-import pint
+import numpy as np
+from collections import namedtuple
 from src.processes.base import TreatmentProcess
+from src.processes._kernels import _microwave_core
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# The direct emissions of the process (in kg), in the order returned by its numeric core.
+MicrowaveEmissions = namedtuple("MicrowaveEmissions", ("nmvoc", "pm10", "pm25", "co2_fossil", "pb"))
 
 class MicrowaveProcess(TreatmentProcess):
     """
@@ -28,54 +29,72 @@ class MicrowaveProcess(TreatmentProcess):
       - emission_limits: A dictionary with limits for "nmvoc", "pm10", and "pm25" (expressed per unit mass of waste).
       - enforce_emission_limits: A boolean indicating whether the calculated emissions should be capped to these limits.
     """
-    def calculate_direct_emissions(self, waste, scenario: dict = None) -> dict:
-        # Work on a copy of the factors to avoid modifying the original.
-        f = copy.deepcopy(self.factors)
-        
-        # Retrieve the organic composition.
-        comp_org = waste.composition["organic_materials"]
-        total_organic = sum(comp_org.values())
+    scenario_keys = ()
+    emission_keys = MicrowaveEmissions._fields
+    factor_keys = ("nmvoc_per_organic", "pm10_per_organic", "pm25_per_organic", "base_frequency",
+                   "operating_frequency", "freq_impact_per_mhz", "plastic_nmvoc_boost", "elec_per_waste",
+                   "grid_co2_factor", "metal_aerosol_factor", "emission_limits", "enforce_emission_limits")
+    factor_defaults = {"enforce_emission_limits": False}
+    __slots__ = factor_keys
+
+    def calculate_emission_result(self, waste, scenario: dict = None) -> MicrowaveEmissions:
+        # Retrieve the organic fractions.
+        total_organic = waste.total_organic
         
         # Calculate the plastic fraction within the organic materials.
-        plastic_frac = (comp_org.get("needles_sharps_plastic", 0) / total_organic) if total_organic > 0 else 0
+        plastic_frac = waste.fossil_organic / total_organic if total_organic > 0 else 0.0
         
-        # Compute the frequency multiplier based on the difference between the base and operating frequencies.
-        freq_diff = f["base_frequency"] - f["operating_frequency"]
-        freq_multiplier = 1 + max(freq_diff, 0) * f["freq_impact_per_mhz"]
+        emissions = self._uncapped_emissions(waste, plastic_frac)
+        return self._apply_emission_limits(emissions, waste.mass_kg, min)
+
+    def calculate_direct_magnitudes_batch(self, batch, scenario: dict = None) -> dict:
+        # Calculate the plastic fraction within the organic materials (0 where there is no organic material).
+        total_organic = batch.total_organic
+        plastic_frac = np.divide(batch.fossil_organic, total_organic,
+                                 out=np.zeros_like(total_organic), where=total_organic > 0)
         
-        # Calculate the NMVOC boost due to plastic content.
-        plastic_boost = 1 + plastic_frac * f["plastic_nmvoc_boost"]
+        emissions = self._uncapped_emissions(batch, plastic_frac)
+        return self._apply_emission_limits(emissions, batch.mass_kg, np.minimum)._asdict()
+
+    def _apply_emission_limits(self, emissions: MicrowaveEmissions, mass, minimum) -> MicrowaveEmissions:
+        """
+        Caps NMVOC, PM10 and PM25 at mass * limit if the emission limits are enforced.
         
-        # Convert the waste mass to kilograms.
-        mass = waste.mass.to("kg").magnitude
+        Pollutants that are missing from emission_limits, or whose limit is None, are left uncapped.
         
-        # Calculate raw emissions:
-        # NMVOC emissions are boosted by both the frequency multiplier and the plastic content.
-        raw_nmvoc = mass * total_organic * f["nmvoc_per_organic"] * freq_multiplier * plastic_boost
-        # PM10 and PM25 emissions are influenced by the frequency multiplier.
-        raw_pm10 = mass * total_organic * f["pm10_per_organic"] * freq_multiplier
-        raw_pm25 = mass * total_organic * f["pm25_per_organic"] * freq_multiplier
-        # CO₂ emissions from electricity consumption.
-        energy_co2 = mass * f["elec_per_waste"] * f["grid_co2_factor"]
-        # Metal aerosol emissions from the metallic fraction (using "other_heavy_metals" for lead).
-        metal_emissions = mass * waste.composition["metallic_materials"].get("other_heavy_metals", 0) * f["metal_aerosol_factor"]
+        Args:
+            emissions: The uncapped emissions.
+            mass: The waste mass in kg (per stream for a batch).
+            minimum: min for a single stream, np.minimum for a batch.
         
-        # Construct the emissions dictionary, attaching units via Pint.
-        emissions = {
-            "nmvoc": raw_nmvoc * ureg("kg"),
-            "pm10": raw_pm10 * ureg("kg"),
-            "pm25": raw_pm25 * ureg("kg"),
-            "co2_fossil": energy_co2 * ureg("kg"),
-            "pb": metal_emissions * ureg("kg"),
-        }
+        Returns:
+            MicrowaveEmissions: The capped emissions in kg.
+        """
+        if not self.enforce_emission_limits:
+            return emissions
+        capped = {}
+        for pollutant in ("nmvoc", "pm10", "pm25"):
+            limit = self.emission_limits.get(pollutant)
+            if limit is not None:
+                capped[pollutant] = minimum(getattr(emissions, pollutant), mass * limit)
+        return emissions._replace(**capped)
+
+    def _uncapped_emissions(self, waste, plastic_frac) -> MicrowaveEmissions:
+        """
+        Calculates the emissions before the emission limits are applied.
         
-        # Enforce emission limits if required.
-        if f.get("enforce_emission_limits", False):
-            for pollutant in ["nmvoc", "pm10", "pm25"]:
-                limit = f["emission_limits"].get(pollutant)
-                if limit is not None:
-                    # Cap the emission for the pollutant at mass * limit.
-                    if emissions[pollutant].magnitude > mass * limit:
-                        emissions[pollutant] = mass * limit * ureg("kg")
+        Args:
+            waste: A WasteStream, or a WasteStreamBatch with plastic_frac given per stream.
+            plastic_frac: The plastic fraction within the organic materials.
         
-        return emissions
+        Returns:
+            MicrowaveEmissions: The emissions in kg.
+        """
+        # Calculate the raw emissions with the numeric core. NMVOC, PM10 and PM25 grow with the difference
+        # between the base and operating frequencies; NMVOC is further boosted by the plastic content.
+        return MicrowaveEmissions(*_microwave_core(
+            waste.mass_kg, waste.total_organic, plastic_frac, waste.heavy_metals,
+            self.nmvoc_per_organic, self.pm10_per_organic, self.pm25_per_organic,
+            self.base_frequency - self.operating_frequency, self.freq_impact_per_mhz, self.plastic_nmvoc_boost,
+            self.elec_per_waste, self.grid_co2_factor, self.metal_aerosol_factor,
+        ))
@@ -1,10 +1,11 @@
 # HospitalWasteManagement/src/processes/pyrolysis.py
 
+from collections import namedtuple
 from src.processes.base import TreatmentProcess
-import pint
+from src.processes._kernels import _pyrolysis_core
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# The direct emissions of the process (in kg), in the order returned by its numeric core.
+PyrolysisEmissions = namedtuple("PyrolysisEmissions", ("co2_fossil", "ch4_fossil", "nmvoc", "pahs", "dioxin", "hg", "pb"))
 
 class PyrolysisProcess(TreatmentProcess):
     """
@@ -25,30 +26,16 @@ class PyrolysisProcess(TreatmentProcess):
       - The method accepts an optional `scenario` dictionary. In this basic implementation, scenario
         parameters are not used to modify the factors, but the parameter is available for future extensions.
     """
-    def calculate_direct_emissions(self, waste, scenario: dict = None) -> dict:
-        # Use the emission factors provided for pyrolysis.
-        f = self.factors
-        
-        # Retrieve organic and chlorinated compositions from the waste.
-        comp_org = waste.composition["organic_materials"]
-        comp_chlor = waste.composition["chlorinated_materials"]
-        
-        # Calculate total organic and total chlorinated fractions.
-        total_organic = sum(comp_org.values())
-        total_chlor = sum(comp_chlor.values())
-        
-        # Convert waste mass to kilograms.
-        mass = waste.mass.to("kg").magnitude
-        
-        # Calculate emissions for each pollutant.
-        emissions = {
-            "co2_fossil": mass * total_organic * f["co2_fossil_per_organic"] * ureg("kg"),
-            "ch4_fossil": mass * total_organic * f["ch4_fossil_per_organic"] * ureg("kg"),
-            "nmvoc": mass * total_organic * f["nmvoc_per_organic"] * ureg("kg"),
-            "pahs": mass * total_organic * f["pahs_per_organic"] * ureg("kg"),
-            "dioxin": mass * total_chlor * f["dioxin_per_chlorinated"] * ureg("kg"),
-            "hg": mass * waste.composition["metallic_materials"].get("mercury_waste", 0) * f["hg_per_mercury"] * ureg("kg"),
-            "pb": mass * waste.composition["metallic_materials"].get("other_heavy_metals", 0) * f["pb_per_heavy_metal"] * ureg("kg"),
-        }
-        
-        return emissions
+    scenario_keys = ()
+    emission_keys = PyrolysisEmissions._fields
+    factor_keys = ("co2_fossil_per_organic", "ch4_fossil_per_organic", "nmvoc_per_organic",
+                   "pahs_per_organic", "dioxin_per_chlorinated", "hg_per_mercury", "pb_per_heavy_metal")
+    __slots__ = factor_keys
+
+    def calculate_emission_result(self, waste, scenario: dict = None) -> PyrolysisEmissions:
+        # Calculate emissions for each pollutant with the numeric core (waste mass in kg, cached composition totals).
+        return PyrolysisEmissions(*_pyrolysis_core(
+            waste.mass_kg, waste.total_organic, waste.total_chlor, waste.mercury, waste.heavy_metals,
+            self.co2_fossil_per_organic, self.ch4_fossil_per_organic, self.nmvoc_per_organic, self.pahs_per_organic,
+            self.dioxin_per_chlorinated, self.hg_per_mercury, self.pb_per_heavy_metal,
+        ))
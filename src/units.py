@@ -0,0 +1,66 @@
+# HospitalWasteManagement/src/units.py
+
+"""
+Shared Pint unit registry.
+
+Every module uses this single registry, so the unit definitions are parsed once and quantities created
+in different modules can be combined directly (Pint refuses to mix quantities from different registries).
+The registry is also installed as Pint's application registry, so code that asks Pint for the default
+registry (pint.get_application_registry, unpickled quantities) gets this one instead of building another.
+"""
+
+from typing import Any, Dict, Mapping, Tuple
+import numpy as np
+from pint import Quantity, UnitRegistry, set_application_registry
+
+# Initialize the shared Pint unit registry.
+ureg = UnitRegistry()
+set_application_registry(ureg)
+
+# Frequently used units.
+KG = ureg.Unit("kg")
+M2YR = ureg.Unit("meter**2 * year")
+
+# Pint unit of each Brightway2 unit name used by the modeled flows (see config.FLOW_UNITS).
+BW_UNITS = {"kilogram": KG, "square meter-year": M2YR}
+
+def pintify(magnitudes: Mapping[str, Any], unit=KG) -> Dict[str, Quantity]:
+    """
+    Attaches a unit to plain emission amounts.
+
+    The emission calculations work on floats (or arrays) in kg; this is the one place where units are
+    attached, for callers that report or combine quantities.
+
+    Args:
+        magnitudes (Mapping[str, Any]): Amounts keyed by emission name (floats or NumPy arrays).
+        unit: The unit of the amounts (kg by default).
+
+    Returns:
+        Dict[str, Quantity]: The amounts as Pint quantities of the shared registry.
+    """
+    return {key: ureg.Quantity(value, unit) for key, value in magnitudes.items()}
+
+def emissions_as_array(emissions: Mapping[str, Any], unit=KG) -> Tuple[Dict[str, int], Quantity]:
+    """
+    Packs an emissions dictionary into one array-valued quantity.
+
+    This is the inverse of pintify: instead of one scalar quantity per emission, the amounts share a
+    single unit and sit in one NumPy array, ready for array arithmetic (e.g. a product with a
+    characterization matrix) without per-emission Pint operations.
+
+    Args:
+        emissions (Mapping[str, Any]): Amounts keyed by emission name, as Pint quantities (converted to
+            the unit) or as plain floats already expressed in the unit.
+        unit: The unit of the array (kg by default).
+
+    Returns:
+        Tuple[Dict[str, int], Quantity]: The position of each emission in the array, and the amounts as
+            a quantity wrapping a float64 array.
+    """
+    index = {key: position for position, key in enumerate(emissions)}
+    magnitudes = np.fromiter(
+        (amount.m_as(unit) if hasattr(amount, "units") else amount for amount in emissions.values()),
+        dtype=np.float64,
+        count=len(index),
+    )
+    return index, ureg.Quantity(magnitudes, unit)
@@ -1,14 +1,19 @@
 # src/waste_stream.py
-import copy
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Sequence
+import numpy as np
 import pint
 from src import config
+from src.units import ureg, KG
 
-# Set up a Pint unit registry.
-ureg = pint.UnitRegistry()
+# The hazardous (group, material) fractions that segregation reduces.
+_SEGREGATED_MATERIALS = (
+    ("organic_materials", "needles_sharps_plastic"),
+    ("organic_materials", "cytotoxic_organic"),
+    ("chlorinated_materials", "lab_reagents"),
+)
 
-@dataclass
+@dataclass(slots=True)
 class WasteStream:
     """
     Represents a waste stream with a given mass (with unit) and a material composition.
@@ -24,11 +29,36 @@ class WasteStream:
                     "radioactive_materials": { ... }
                 }
             The default composition is loaded from the config module.
+        mass_kg (float): The mass converted to kilograms.
+        total_organic (float): The sum of the organic material fractions.
+        total_chlor (float): The sum of the chlorinated material fractions.
+        fossil_organic (float): The fossil-derived organic fraction (needles and sharps plastic).
+        mercury (float): The mercury waste fraction of the metallic materials.
+        heavy_metals (float): The other heavy metals fraction of the metallic materials.
+
+    The derived attributes (mass_kg and the composition totals) are computed once when the stream is
+    created, so the process calculations do not repeat them. Treat the stream as immutable: create a
+    new one (e.g., with adjust_for_segregation) instead of modifying mass or composition in place.
     """
     mass: pint.Quantity  # e.g., 100 * ureg("kg")
-    composition: Dict[str, Dict[str, float]] = field(
-        default_factory=lambda: copy.deepcopy(config.DEFAULT_COMPOSITION)
-    )
+    composition: Dict[str, Dict[str, float]] = field(default_factory=config._build_default_composition)
+    mass_kg: float = field(init=False, repr=False, compare=False)
+    total_organic: float = field(init=False, repr=False, compare=False)
+    total_chlor: float = field(init=False, repr=False, compare=False)
+    fossil_organic: float = field(init=False, repr=False, compare=False)
+    mercury: float = field(init=False, repr=False, compare=False)
+    heavy_metals: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.mass_kg = float(self.mass.to(KG).magnitude)
+        organic = self.composition["organic_materials"]
+        metallic = self.composition["metallic_materials"]
+        # Stored as floats, the argument type the compiled process kernels are declared for.
+        self.total_organic = float(sum(organic.values()))
+        self.total_chlor = float(sum(self.composition["chlorinated_materials"].values()))
+        self.fossil_organic = float(organic.get("needles_sharps_plastic", 0.0))
+        self.mercury = float(metallic.get("mercury_waste", 0.0))
+        self.heavy_metals = float(metallic.get("other_heavy_metals", 0.0))
 
     def adjust_for_segregation(self, efficiency: float) -> 'WasteStream':
         """
@@ -46,16 +76,118 @@ class WasteStream:
         Returns:
             WasteStream: A new WasteStream instance with the adjusted composition.
         """
-        # Create a deep copy of the current composition so as not to modify the original.
-        new_comp = copy.deepcopy(self.composition)
+        # Copy each material group of the current composition so as not to modify the original.
+        new_comp = {group: dict(fractions) for group, fractions in self.composition.items()}
         
         # Adjust the hazardous fractions based on the provided segregation efficiency.
-        if "needles_sharps_plastic" in new_comp["organic_materials"]:
-            new_comp["organic_materials"]["needles_sharps_plastic"] *= efficiency
-        if "cytotoxic_organic" in new_comp["organic_materials"]:
-            new_comp["organic_materials"]["cytotoxic_organic"] *= efficiency
-        if "lab_reagents" in new_comp["chlorinated_materials"]:
-            new_comp["chlorinated_materials"]["lab_reagents"] *= efficiency
+        for group, material in _SEGREGATED_MATERIALS:
+            fractions = new_comp[group]
+            if material in fractions:
+                fractions[material] *= efficiency
         
         # Return a new WasteStream instance with the same mass but adjusted composition.
-        return WasteStream(mass=self.mass, composition=new_comp)
\ No newline at end of file
+        return WasteStream(mass=self.mass, composition=new_comp)
+
+    def adjust_for_segregation_batch(self, efficiencies) -> 'WasteStreamBatch':
+        """
+        Adjusts the waste composition for several segregation efficiencies at once.
+
+        Element i of the returned batch equals adjust_for_segregation(efficiencies[i]); each hazardous
+        fraction is scaled with one array multiplication instead of one adjusted stream per efficiency.
+
+        Args:
+            efficiencies (array-like): The segregation efficiencies, each between 0 and 1.
+
+        Returns:
+            WasteStreamBatch: One waste stream per efficiency, all with the mass of this stream.
+        """
+        efficiencies = np.asarray(efficiencies, dtype=np.float64)
+        ones = np.ones_like(efficiencies)
+        composition = {
+            group: {material: fraction * ones for material, fraction in fractions.items()}
+            for group, fractions in self.composition.items()
+        }
+        for group, material in _SEGREGATED_MATERIALS:
+            fractions = self.composition[group]
+            if material in fractions:
+                composition[group][material] = fractions[material] * efficiencies
+        return WasteStreamBatch(mass_kg=self.mass_kg * ones, composition=composition)
+
+@dataclass(slots=True)
+class WasteStreamBatch:
+    """
+    Represents a population of waste streams as arrays (one element per stream).
+
+    The batch exposes the same attributes as WasteStream, holding NumPy arrays instead of floats, so a
+    treatment process can compute the emissions of every stream with one array expression per pollutant
+    instead of one Python call per stream.
+
+    Attributes:
+        mass_kg (np.ndarray): The mass of each waste stream in kilograms (float64).
+        composition (Dict[str, Dict[str, np.ndarray]]): The composition of the waste streams, with the same
+            nested structure as WasteStream.composition and one array of fractions per material.
+        total_organic (np.ndarray): The sum of the organic material fractions of each stream.
+        total_chlor (np.ndarray): The sum of the chlorinated material fractions of each stream.
+        fossil_organic (np.ndarray): The fossil-derived organic fraction (needles and sharps plastic) of each stream.
+        mercury (np.ndarray): The mercury waste fraction of each stream.
+        heavy_metals (np.ndarray): The other heavy metals fraction of each stream.
+    """
+    mass_kg: np.ndarray
+    composition: Dict[str, Dict[str, np.ndarray]]
+    total_organic: np.ndarray = field(init=False, repr=False, compare=False)
+    total_chlor: np.ndarray = field(init=False, repr=False, compare=False)
+    fossil_organic: np.ndarray = field(init=False, repr=False, compare=False)
+    mercury: np.ndarray = field(init=False, repr=False, compare=False)
+    heavy_metals: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # The compiled process kernels are declared for writable, C-contiguous 1-D float64 arrays only (see
+        # processes/_kernels.py), so every input is copied into one here (flattening the mass and broadcasting
+        # each fraction to one element per stream) instead of failing to dispatch when Numba is installed.
+        self.mass_kg = np.array(np.ravel(self.mass_kg), dtype=np.float64)
+        shape = self.mass_kg.shape
+        self.composition = {
+            group: {
+                material: np.array(np.broadcast_to(np.ravel(fraction), shape), dtype=np.float64)
+                for material, fraction in fractions.items()
+            }
+            for group, fractions in self.composition.items()
+        }
+        zeros = np.zeros_like(self.mass_kg)
+        organic = self.composition["organic_materials"]
+        metallic = self.composition["metallic_materials"]
+        self.total_organic = sum(organic.values(), zeros)
+        self.total_chlor = sum(self.composition["chlorinated_materials"].values(), zeros)
+        self.fossil_organic = organic.get("needles_sharps_plastic", zeros)
+        self.mercury = metallic.get("mercury_waste", zeros)
+        self.heavy_metals = metallic.get("other_heavy_metals", zeros)
+
+    def __len__(self) -> int:
+        return len(self.mass_kg)
+
+    @classmethod
+    def from_streams(cls, streams: Sequence[WasteStream]) -> 'WasteStreamBatch':
+        """
+        Builds a batch from individual waste streams.
+
+        Args:
+            streams (Sequence[WasteStream]): The waste streams, in the order of the batch elements.
+
+        Returns:
+            WasteStreamBatch: A batch holding the masses and composition fractions of the streams.
+                A material missing from a stream's composition has a fraction of 0 for that stream.
+        """
+        mass_kg = np.fromiter((stream.mass_kg for stream in streams), dtype=np.float64, count=len(streams))
+        composition = {}
+        for stream in streams:
+            for group, fractions in stream.composition.items():
+                materials = composition.setdefault(group, {})
+                for material in fractions:
+                    materials.setdefault(material, None)
+        for group, materials in composition.items():
+            for material in materials:
+                materials[material] = np.fromiter(
+                    (stream.composition.get(group, {}).get(material, 0.0) for stream in streams),
+                    dtype=np.float64, count=len(streams),
+                )
+        return cls(mass_kg=mass_kg, composition=composition)
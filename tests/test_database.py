@@ -1,40 +1,93 @@
 # HospitalWasteManagement/tests/test_database.py
 
+import os
+import sqlite3
 import unittest
 import logging
+from collections import Counter
 from pathlib import Path
-from types import SimpleNamespace
 
 import brightway2 as bw
-import pint
+from bw2data.backends.peewee import sqlite3_lci_db
+from src.units import ureg, KG, M2YR
 
 from src.database import (
+    FLOW_UUIDS,
     setup_project,
-    build_flow_index,
+    get_flow_by_uuid,
     retrieve_flows,
+    compute_config_hash,
+    tag_db_hash,
     create_or_reset_db,
     create_activity,
     add_production_exchange,
-    add_biosphere_exchanges
+    add_biosphere_exchanges,
+    biosphere_exchange_data,
+    build_activity_data
 )
 
-# Initialize a Pint unit registry.
-ureg = pint.UnitRegistry()
-
 # Optional: Suppress excessive Brightway2 logging during tests.
 logging.getLogger("brightway2").setLevel(logging.WARNING)
 
 
+class _Flow:
+    """Minimal stand-in for a biosphere flow: the database functions only read its key."""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+
+class _BrokenDatabase:
+    """Stand-in for a biosphere database whose lookups fail for a reason other than a missing flow."""
+    def get(self, code):
+        raise sqlite3.OperationalError("database is locked")
+
+
+# Parallel test runners (pytest-xdist) name each worker in PYTEST_XDIST_WORKER. Each worker gets its own
+# project, and so its own SQLite files, so workers neither share test databases nor wait on each
+# other's locks. The database names can stay the same because they are scoped by the project.
+_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+TEST_PROJECT_NAME = f"TestProjectForDatabaseTests_{_WORKER}" if _WORKER else "TestProjectForDatabaseTests"
+# Set up once per module run by setUpModule and shared by every test class in the module.
+BIO_DB = None
+FLOWS = None
+
+# The SQLite settings used while the module runs, and the values they had before, restored by tearDownModule.
+_FAST_PRAGMAS = (("synchronous", "OFF"), ("journal_mode", "MEMORY"), ("temp_store", "MEMORY"))
+_SAVED_PRAGMAS = {}
+
+
+def setUpModule():
+    """
+    Set up the test project and retrieve its biosphere flows once for the whole module.
+    """
+    global BIO_DB, FLOWS
+    BIO_DB = setup_project(TEST_PROJECT_NAME)
+    FLOWS = retrieve_flows(BIO_DB)
+    # The test project is disposable, so its LCI database does not need to survive a crash: skip the
+    # sync to disk after each save and keep the rollback journal and temporary tables in memory.
+    for pragma, value in _FAST_PRAGMAS:
+        _SAVED_PRAGMAS[pragma] = sqlite3_lci_db.execute_sql(f"PRAGMA {pragma}").fetchone()[0]
+        sqlite3_lci_db.execute_sql(f"PRAGMA {pragma} = {value}")
+
+
+def tearDownModule():
+    """Restore the SQLite settings the shared connection had before setUpModule changed them."""
+    for pragma, _ in reversed(_FAST_PRAGMAS):
+        if pragma in _SAVED_PRAGMAS:
+            sqlite3_lci_db.execute_sql(f"PRAGMA {pragma} = {_SAVED_PRAGMAS.pop(pragma)}")
+
+
 class TestDatabaseFunctions(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """
-        Set up a test project and create a test database to be used in the tests.
+        Create a test database in the module's test project to be used in the tests.
         """
-        cls.test_project_name = "TestProjectForDatabaseTests"
-        cls.bio_db = setup_project(cls.test_project_name)
-        cls.flow_index = build_flow_index(cls.bio_db)
-        cls.flows = retrieve_flows(cls.flow_index)
+        cls.test_project_name = TEST_PROJECT_NAME
+        cls.bio_db = BIO_DB
+        cls.flows = FLOWS
         cls.test_db_name = "TestDB"
         cls.test_db = create_or_reset_db(cls.test_db_name)
 
@@ -43,18 +96,75 @@ class TestDatabaseFunctions(unittest.TestCase):
         self.assertIsNotNone(self.bio_db, "The biosphere database should not be None.")
         self.assertIn("biosphere3", bw.databases, "The biosphere database (biosphere3) should be available.")
 
-    def test_build_and_retrieve_flows(self):
-        """Test that building the flow index and retrieving flows returns a dictionary with expected keys."""
-        self.assertIsInstance(self.flow_index, dict, "Flow index should be a dictionary.")
+    def test_retrieve_flows(self):
+        """Test that retrieving flows returns a dictionary with expected keys."""
         self.assertIsInstance(self.flows, dict, "Retrieved flows should be a dictionary.")
         # Check that at least one expected key exists (e.g., 'co2_fossil').
         self.assertIn("co2_fossil", self.flows, "The 'co2_fossil' flow should be present in the retrieved flows.")
 
+    def test_retrieve_flows_cached(self):
+        """Test that repeated flow retrievals reuse the cached flows but return independent dictionaries."""
+        flows = retrieve_flows(self.bio_db)
+        self.assertEqual(flows, self.flows, "Repeated retrievals should return the same flows.")
+        self.assertIsNot(flows, self.flows, "Each retrieval should return its own dictionary.")
+        self.assertIs(flows["co2_fossil"], self.flows["co2_fossil"], "The flow objects should come from the cache.")
+
+    def test_retrieve_flows_refreshed_after_rewrite(self):
+        """Test that rewriting a flow database invalidates its cached flows."""
+        db_name = "TestBioFlows"
+        db = create_or_reset_db(db_name)
+        data = {(db_name, FLOW_UUIDS["co2_fossil"]): {"name": "Carbon dioxide, fossil", "unit": "kilogram",
+                                                        "type": "emission", "exchanges": []}}
+        db.write(data)
+        # The other modeling flows are missing from this database and are reported as errors.
+        with self.assertLogs(level="ERROR"):
+            flows = retrieve_flows(db)
+        self.assertIs(retrieve_flows(db)["co2_fossil"], flows["co2_fossil"], "Unchanged flows should be cached.")
+        self.assertIsNone(flows["so2"], "Flows missing from the database should be None.")
+
+        db.write(data)
+        with self.assertLogs(level="ERROR"):
+            rewritten = retrieve_flows(db)
+        self.assertIsNot(rewritten["co2_fossil"], flows["co2_fossil"], "A rewritten database should be queried again.")
+
+    def test_get_flow_by_uuid_missing(self):
+        """Test that looking up an unknown UUID raises a KeyError chained to the lookup error."""
+        with self.assertRaises(KeyError) as context:
+            get_flow_by_uuid(self.bio_db, "not-a-real-uuid")
+        self.assertIsNotNone(context.exception.__cause__)
+
+    def test_get_flow_by_uuid_database_error(self):
+        """Test that a database error is not reported as a missing flow."""
+        with self.assertRaises(sqlite3.OperationalError):
+            get_flow_by_uuid(_BrokenDatabase(), FLOW_UUIDS["co2_fossil"])
+
     def test_create_or_reset_db(self):
         """Test that a new database can be created or reset."""
         # After creating, the database name should be in bw.databases.
         self.assertIn(self.test_db_name, bw.databases, f"Database '{self.test_db_name}' should exist in Brightway2 databases.")
 
+    def test_compute_config_hash(self):
+        """Test that the configuration hash ignores key order but changes with content."""
+        h1 = compute_config_hash({"a": 1, "b": 2}, [1, 2])
+        h2 = compute_config_hash({"b": 2, "a": 1}, [1, 2])
+        h3 = compute_config_hash({"a": 1, "b": 3}, [1, 2])
+        self.assertEqual(h1, h2, "Equal configurations should produce the same hash.")
+        self.assertNotEqual(h1, h3, "Different configurations should produce different hashes.")
+
+    def test_create_or_reset_db_reuses_matching_hash(self):
+        """Test that a database tagged with the expected hash is reused, and reset otherwise."""
+        db_name = "TestDBHashed"
+        db = create_or_reset_db(db_name, expected_hash="hash-1")
+        create_activity(db, "KEEP_ME", "Activity that should survive reuse")
+        tag_db_hash(db, "hash-1")
+
+        reused = create_or_reset_db(db_name, expected_hash="hash-1")
+        self.assertEqual(len(reused), 1, "A database with a matching hash should be reused unchanged.")
+
+        reset = create_or_reset_db(db_name, expected_hash="hash-2")
+        self.assertEqual(len(reset), 0, "A database with a different hash should be reset.")
+        self.assertNotIn("config_hash", bw.databases[db_name], "A reset database should not keep a stale hash.")
+
     def test_create_activity(self):
         """Test that an activity is created with the correct attributes."""
         code = "TEST_ACTIVITY"
@@ -71,14 +181,13 @@ class TestDatabaseFunctions(unittest.TestCase):
         activity = create_activity(self.test_db, code, name)
         # First, add a production exchange.
         add_production_exchange(activity, amount=1.0)
-        # Count production exchanges.
-        prod_exchanges = [exc for exc in list(activity.exchanges()) if exc["type"] == "production"]
-        self.assertEqual(len(prod_exchanges), 1, "There should be exactly one production exchange after adding.")
+        # Count the production exchanges with a COUNT query, without loading the exchanges.
+        self.assertEqual(len(activity.production()), 1, "There should be exactly one production exchange after adding.")
 
         # If we add again, it should replace the existing one.
         add_production_exchange(activity, amount=1.0)
-        prod_exchanges = [exc for exc in list(activity.exchanges()) if exc["type"] == "production"]
-        self.assertEqual(len(prod_exchanges), 1, "There should still be exactly one production exchange after re-adding.")
+        self.assertEqual(len(activity.production()), 1,
+                         "There should still be exactly one production exchange after re-adding.")
 
     def test_add_biosphere_exchanges(self):
         """Test that biosphere exchanges are added to an activity based on an emissions dictionary and flows."""
@@ -88,32 +197,69 @@ class TestDatabaseFunctions(unittest.TestCase):
         
         # Create a dummy emissions dictionary.
         emissions = {
-            "co2_fossil": 10 * ureg("kg"),
-            "so2": 5 * ureg("kg"),
-            "pm25": 0 * ureg("kg")  # This one is negligible and should be skipped.
+            "co2_fossil": 10 * KG,
+            "so2": 5 * KG,
+            "pm25": 0 * KG  # This one is negligible and should be skipped.
         }
         
-        # Create a dummy flows dictionary. Each flow is a simple object with a 'key' attribute.
+        # Create a dummy flows dictionary. Each flow is a _Flow with a 'key' attribute.
         dummy_flows = {
-            "co2_fossil": SimpleNamespace(key="dummy_key_co2"),
-            "so2": SimpleNamespace(key="dummy_key_so2"),
-            "pm25": SimpleNamespace(key="dummy_key_pm25")
+            "co2_fossil": _Flow(("biosphere3", "dummy_key_co2")),
+            "so2": _Flow(("biosphere3", "dummy_key_so2")),
+            "pm25": _Flow(("biosphere3", "dummy_key_pm25"))
         }
         
         # Add biosphere exchanges.
         add_biosphere_exchanges(activity, emissions, dummy_flows)
         
-        # Retrieve exchanges from the activity and count biosphere exchanges (skip production exchanges).
-        biosphere_exchanges = [exc for exc in list(activity.exchanges()) if exc["type"] == "biosphere"]
+        # Retrieve the biosphere exchanges of the activity (filtered by type in the query).
+        biosphere_exchanges = list(activity.biosphere())
         # In our emissions dictionary, only "co2_fossil" and "so2" should be added (pm25 is negligible).
         self.assertEqual(len(biosphere_exchanges), 2, "There should be two biosphere exchanges added to the activity.")
         
         # Optionally, verify that the exchanges have the correct units and input keys.
         for exc in biosphere_exchanges:
-            self.assertTrue("kg" in str(exc["unit"]), "The unit of the exchange should include 'kg'.")
-            self.assertTrue(exc["input"] in ["dummy_key_co2", "dummy_key_so2"],
+            self.assertEqual(exc["unit"], "kilogram", "The unit of the exchange should be 'kilogram'.")
+            self.assertTrue(exc["input"] in [("biosphere3", "dummy_key_co2"), ("biosphere3", "dummy_key_so2")],
                             "The exchange input key should match one of the dummy flow keys.")
 
+    def test_exchange_units_match_for_quantities_and_floats(self):
+        """Test that quantities and plain floats in the flows' units give the same exchange amounts and units."""
+        flows = {
+            "co2_fossil": _Flow(("biosphere3", "dummy_key_co2")),
+            "land_occupation": _Flow(("biosphere3", "dummy_key_land")),
+        }
+        from_quantities = biosphere_exchange_data({"co2_fossil": 500 * ureg.gram, "land_occupation": 2 * M2YR}, flows)
+        from_floats = biosphere_exchange_data({"co2_fossil": 0.5, "land_occupation": 2.0}, flows)
+        self.assertEqual(from_quantities, from_floats)
+        self.assertEqual([exc["unit"] for exc in from_floats], ["kilogram", "square meter-year"])
+
+    def test_build_activity_data_write(self):
+        """Test that activity datasets built from emissions can be written to a database in one call."""
+        db_name = "TestDBBulk"
+        db = create_or_reset_db(db_name)
+        emissions = {
+            "co2_fossil": 10 * KG,
+            "so2": 5 * KG,
+            "pm25": 0 * KG  # Negligible, so no exchange should be created.
+        }
+        dummy_flows = {
+            "co2_fossil": _Flow(("biosphere3", "aa7cac3a-3625-41d4-bc54-33e2cf11ec46")),
+            "so2": _Flow(("biosphere3", "78c3efe4-421c-4d30-82e4-b97ac5124993")),
+            "pm25": _Flow(("biosphere3", "66f50b33-fd62-4fdd-a373-c5b0de7de00d"))
+        }
+        data = {
+            (db_name, "BULK_ACT"): build_activity_data(db_name, "BULK_ACT", "Bulk Activity", emissions, dummy_flows)
+        }
+        db.write(data)
+
+        activity = db.get("BULK_ACT")
+        counts = Counter(exc["type"] for exc in activity.exchanges())
+        self.assertEqual(counts["production"], 1,
+                         "The written activity should have exactly one production exchange.")
+        self.assertEqual(counts["biosphere"], 2,
+                         "Only the non-negligible emissions should be written as biosphere exchanges.")
+
 
 if __name__ == '__main__':
-    unittest.main()
+    unittest.main()
\ No newline at end of file
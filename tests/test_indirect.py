@@ -0,0 +1,80 @@
+# HospitalWasteManagement/tests/test_indirect.py
+
+import unittest
+from src.units import KG
+from src.waste_stream import WasteStream
+from src.indirect import IndirectEmissionsCalculator
+from src import config
+
+class TestIndirectEmissionsCalculator(unittest.TestCase):
+    def setUp(self):
+        # Create a dummy waste stream with a mass of 100 kg and use KBTH's indirect factors.
+        self.mass = 100 * KG
+        self.waste_stream = WasteStream(mass=self.mass)
+        self.factors = config.HOSPITAL_INDIRECT_FACTORS["KBTH"]
+        self.calc = IndirectEmissionsCalculator(self.factors)
+
+    def test_calculate_matches_factor_formulas(self):
+        """Test that each indirect emission equals the sum of its energy, transport, infrastructure and residue terms."""
+        emissions = self.calc.calculate(self.waste_stream)
+        energy = self.factors["energy_inputs"]
+        transport = self.factors["transportation"]
+        infra = self.factors["infrastructure"]
+        downstream = self.factors["downstream"]
+        mass = 100.0
+        tkm = mass / 1000.0 * transport["distance_km"]
+        residue_mass = mass * downstream["residue_ratio"]
+        expected = {
+            "co2_fossil": (mass * energy["energy_use_kWh_per_kg"] * energy["co2_fossil_per_kWh"]
+                           + tkm * transport["co2_fossil_per_tkm"]
+                           + mass * infra["construction_co2_per_kg"]
+                           + residue_mass * downstream["residue_co2_per_kg"]),
+            "so2": (mass * energy["energy_use_kWh_per_kg"] * energy["so2_per_kWh"]
+                    + residue_mass * downstream["residue_so2_per_kg"]),
+            "pm25": mass * energy["energy_use_kWh_per_kg"] * energy["pm25_per_kWh"],
+            "nox": tkm * transport["nox_per_tkm"],
+            "land_occupation": mass * infra["land_use_factor"],
+        }
+        missing = expected.keys() - emissions.keys()
+        self.assertFalse(missing, f"Indirect emissions are missing {sorted(missing)}.")
+        for key, value in expected.items():
+            self.assertAlmostEqual(emissions[key].magnitude, value, msg=f"Indirect '{key}' emission is incorrect.")
+
+    def test_hospital_index_matches_factors(self):
+        """Test that coefficients sliced from the per-hospital arrays match those folded from each factor dict."""
+        for index, name in enumerate(config.HOSPITAL_NAMES):
+            from_dict = IndirectEmissionsCalculator(config.HOSPITAL_INDIRECT_FACTORS[name]).calculate(self.waste_stream)
+            from_arrays = IndirectEmissionsCalculator(
+                config.HOSPITAL_INDIRECT_FACTORS[name], hospital_index=index
+            ).calculate(self.waste_stream)
+            for key, value in from_dict.items():
+                self.assertAlmostEqual(from_arrays[key].magnitude, value.magnitude,
+                                       msg=f"{name} '{key}' should not depend on how coefficients are built.")
+
+    def test_indirect_arrays_keep_sections(self):
+        """Test that the per-hospital factor arrays are grouped by section and hold each hospital's factor."""
+        for index, name in enumerate(config.HOSPITAL_NAMES):
+            for section, fields in config.HOSPITAL_INDIRECT_FACTORS[name].items():
+                for key, value in fields.items():
+                    self.assertEqual(config.INDIRECT_ARRAYS[section][key][index], value,
+                                     f"{name} '{section}.{key}' should be in its section's array.")
+
+    def test_units(self):
+        """Test that mass emissions are in kilograms and land occupation is an area-time quantity."""
+        emissions = self.calc.calculate(self.waste_stream)
+        self.assertEqual(emissions["co2_fossil"].units, emissions["co2_fossil"].to("kg").units)
+        self.assertTrue(emissions["land_occupation"].check("[length] ** 2 * [time]"),
+                        "Land occupation should be expressed as area times time.")
+
+    def test_calculate_vector_matches_calculate(self):
+        """Test that the flow vector holds the same values as the per-emission quantities, in FLOW_ORDER."""
+        emissions = self.calc.calculate(self.waste_stream)
+        vector = self.calc.calculate_vector(self.waste_stream)
+        self.assertEqual(len(vector), len(config.FLOW_ORDER))
+        for key, flow_index in config.FLOW_INDEX.items():
+            expected = emissions[key].magnitude if key in emissions else 0.0
+            self.assertAlmostEqual(vector[flow_index], expected, places=12,
+                                   msg=f"Vector entry for {key} does not match calculate().")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# HospitalWasteManagement/tests/test_lcia.py
+
+import os
+import unittest
+import logging
+
+import brightway2 as bw
+from src.units import KG
+
+from src.database import create_or_reset_db, build_activity_data
+from src.lcia import compute_lcia, compute_lcia_multi, compute_lcia_batch
+
+# Optional: Suppress excessive Brightway2 logging during tests.
+logging.getLogger("brightway2").setLevel(logging.WARNING)
+
+# A project of its own (one per pytest-xdist worker), holding only the small databases written below.
+_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+TEST_PROJECT_NAME = f"TestProjectForLCIATests_{_WORKER}" if _WORKER else "TestProjectForLCIATests"
+
+# Test LCIA methods with known characterization factors (per kg of the flow).
+_CO2_METHOD = ("TestLCIA", "co2 only")
+_CO2_SO2_METHOD = ("TestLCIA", "co2 and so2")
+_MISSING_METHOD = ("TestLCIA", "not registered")
+
+
+class TestLCIA(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Write two biosphere flows, two LCIA methods and two activities with known emissions to the test project.
+
+        The project does not need the full biosphere3 database, so it is not set up with bw2setup.
+        """
+        bw.projects.set_current(TEST_PROJECT_NAME)
+        bio_name = "TestLCIABiosphere"
+        bio_db = create_or_reset_db(bio_name)
+        bio_db.write({
+            (bio_name, code): {"name": name, "unit": "kilogram", "type": "emission", "exchanges": []}
+            for code, name in (("co2", "Carbon dioxide, fossil"), ("so2", "Sulfur dioxide"))
+        })
+        co2_key, so2_key = (bio_name, "co2"), (bio_name, "so2")
+        bw.Method(_CO2_METHOD).register()
+        bw.Method(_CO2_METHOD).write([(co2_key, 1.0)])
+        bw.Method(_CO2_SO2_METHOD).register()
+        bw.Method(_CO2_SO2_METHOD).write([(co2_key, 1.0), (so2_key, 2.0)])
+
+        db_name = "TestLCIADB"
+        db = create_or_reset_db(db_name)
+        flow_keys = {"co2_fossil": co2_key, "so2": so2_key}
+        db.write({
+            (db_name, "ACT_A"): build_activity_data(
+                db_name, "ACT_A", "Activity A", {"co2_fossil": 10 * KG, "so2": 5 * KG}, flow_keys
+            ),
+            (db_name, "ACT_B"): build_activity_data(
+                db_name, "ACT_B", "Activity B", {"co2_fossil": 3 * KG}, flow_keys
+            ),
+        })
+        cls.activity_a = db.get("ACT_A")
+        cls.activity_b = db.get("ACT_B")
+
+    def test_compute_lcia_multi(self):
+        """Test that one activity is scored for several methods, matching a separate LCA per method."""
+        scores = compute_lcia_multi(self.activity_a, [_CO2_METHOD, _CO2_SO2_METHOD])
+        self.assertEqual(set(scores), {_CO2_METHOD, _CO2_SO2_METHOD})
+        self.assertAlmostEqual(scores[_CO2_METHOD], 10.0)
+        self.assertAlmostEqual(scores[_CO2_SO2_METHOD], 10.0 + 5.0 * 2.0)
+        for method, score in scores.items():
+            self.assertAlmostEqual(score, compute_lcia(self.activity_a, method))
+        self.assertEqual(compute_lcia_multi(self.activity_a, []), {}, "No methods should give no scores.")
+
+    def test_compute_lcia_multi_failed_setup(self):
+        """Test that every method is scored 0.0 when the first method cannot be loaded."""
+        with self.assertLogs(level="ERROR"):
+            scores = compute_lcia_multi(self.activity_a, [_MISSING_METHOD, _CO2_METHOD])
+        self.assertEqual(scores, {_MISSING_METHOD: 0.0, _CO2_METHOD: 0.0})
+
+    def test_compute_lcia_multi_failed_method(self):
+        """Test that a method failing after the first one is scored 0.0 without affecting the others."""
+        with self.assertLogs(level="ERROR"):
+            scores = compute_lcia_multi(self.activity_a, [_CO2_METHOD, _MISSING_METHOD, _CO2_SO2_METHOD])
+        self.assertAlmostEqual(scores[_CO2_METHOD], 10.0)
+        self.assertEqual(scores[_MISSING_METHOD], 0.0)
+        self.assertAlmostEqual(scores[_CO2_SO2_METHOD], 20.0)
+
+    def test_compute_lcia_batch_matches_multi(self):
+        """Test that the batch scores of each activity match its per-activity scores."""
+        methods = [_CO2_METHOD, _CO2_SO2_METHOD]
+        scores = compute_lcia_batch([self.activity_a, self.activity_b], methods)
+        for activity in (self.activity_a, self.activity_b):
+            for method, score in compute_lcia_multi(activity, methods).items():
+                self.assertAlmostEqual(scores[(activity["code"], method)], score)
+        self.assertAlmostEqual(scores[("ACT_B", _CO2_SO2_METHOD)], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 # HospitalWasteManagement/tests/test_processes.py
 
 import unittest
-import pint
-from src.waste_stream import WasteStream
+import numpy as np
+from src.units import ureg, KG, emissions_as_array
+from src.waste_stream import WasteStream, WasteStreamBatch
 from src.processes.incineration import IncinerationProcess
 from src.processes.landfill import LandfillProcess
 from src.processes.pyrolysis import PyrolysisProcess
@@ -10,111 +11,310 @@ from src.processes.chem_disinfection import ChemDisinfectionProcess
 from src.processes.autoclave import AutoclaveProcess
 from src.processes.microwave import MicrowaveProcess
 from src import config
+from src.jit import NUMBA_AVAILABLE
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
+# Dummy factors for the processes whose emission factors are not defined in config.
+_CHEM_DEFAULTS = {
+    "disinfectant_ratio": 0.1,
+    "chlorine_loss": 0.05,
+    "chlorine_to_hcl_split": 0.6,
+    "nitrogen_content": 0.03,
+    "nitrogen_to_nh3": 0.2,
+    "nmvoc_per_organic": 1e-15,
+    "pm10_per_organic": 2e-7
+}
+
+_AUTO_DEFAULTS = {
+    "nmvoc_per_organic": 1e-5,
+    "pm10_per_organic": 5e-5,
+    "pm25_per_organic": 3e-5,
+    "elec_per_waste": 0.6,
+    "grid_co2_factor": 0.4,
+    "baseline_temp": 121,
+    "operating_temp": 134,
+    "nmvoc_temp_coeff": 0.2,
+    "hg_leach_factor": 0.001
+}
+
+_MICRO_DEFAULTS = {
+    "nmvoc_per_organic": 0.002,
+    "pm10_per_organic": 0.0006,
+    "pm25_per_organic": 0.0004,
+    "base_frequency": 2450,
+    "operating_frequency": 915,
+    "freq_impact_per_mhz": 0.0002,
+    "plastic_nmvoc_boost": 0.8,
+    "elec_per_waste": 0.7,
+    "grid_co2_factor": 0.4,
+    "metal_aerosol_factor": 0.005,
+    "emission_limits": {
+        "nmvoc": 0.003,
+        "pm10": 0.002,
+        "pm25": 0.001,
+    },
+    "enforce_emission_limits": True
+}
+
+_DUMMY_FACTORS = {
+    "CHEM_DISINFECTION": _CHEM_DEFAULTS,
+    "AUTOCLAVE": _AUTO_DEFAULTS,
+    "MICROWAVE": _MICRO_DEFAULTS,
+}
+
+# (process class, factor key in config.EMISSION_FACTORS, process name, expected emission keys)
+_PROCESS_CASES = [
+    (IncinerationProcess, "INCINERATION", "Incineration",
+     ["co2_fossil", "co2_biogenic", "so2", "nox", "pm10", "pm25", "hg", "pb"]),
+    (LandfillProcess, "LANDFILL", "Landfill", ["ch4_biogenic", "co2_biogenic", "hg", "pb", "nmvoc", "nh3"]),
+    (PyrolysisProcess, "PYROLYSIS", "Pyrolysis", ["co2_fossil", "ch4_fossil", "nmvoc", "pahs", "dioxin", "hg", "pb"]),
+    (ChemDisinfectionProcess, "CHEM_DISINFECTION", "Chemical Disinfection", ["chlorine_air", "nmvoc", "nh3", "pm10"]),
+    (AutoclaveProcess, "AUTOCLAVE", "Autoclave", ["nmvoc", "pm10", "pm25", "co2_fossil", "hg"]),
+    (MicrowaveProcess, "MICROWAVE", "Microwave", ["nmvoc", "pm10", "pm25", "co2_fossil", "pb"]),
+]
 
 class TestProcesses(unittest.TestCase):
-    def setUp(self):
-        # Create a dummy waste stream with a mass of 100 kg.
-        self.mass = 100 * ureg("kg")
-        self.waste_stream = WasteStream(mass=self.mass)
+    @classmethod
+    def setUpClass(cls):
+        # Create a dummy waste stream with a mass of 100 kg. The processes do not modify the waste stream or
+        # the scenario, so all tests share them.
+        cls.mass = 100 * KG
+        cls.waste_stream = WasteStream(mass=cls.mass)
         # Define a common scenario dictionary for testing purposes.
-        self.scenario = {
+        cls.scenario = {
             "segregation_efficiency": 0.8,
             "incineration_flue_gas_efficiency": 0.5,
             "landfill_best_practices": True,
             "chemical_disinfection_fraction": 0.5
         }
 
-    def test_incineration_process(self):
+    def test_all_processes(self):
+        """Test that every process returns its expected emissions, each with units."""
+        for process_cls, factor_key, name, expected_keys in _PROCESS_CASES:
+            with self.subTest(process=process_cls.__name__):
+                factors = config.EMISSION_FACTORS.get(factor_key) or _DUMMY_FACTORS[factor_key]
+                proc = process_cls(name, factors)
+                emissions = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
+                missing = set(expected_keys) - emissions.keys()
+                self.assertFalse(missing, f"{name} emissions are missing {sorted(missing)}.")
+                self.assertTrue(all(hasattr(emissions[key], "units") for key in expected_keys),
+                                f"Every {name} emission should have units.")
+
+    def test_magnitude_fast_path(self):
+        """Test that return_magnitudes yields the same amounts as plain floats in kg."""
         proc = IncinerationProcess("Incineration", config.EMISSION_FACTORS["INCINERATION"])
+        magnitudes = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario, return_magnitudes=True)
         emissions = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
-        expected_keys = ["co2_fossil", "co2_biogenic", "so2", "nox", "pm10", "pm25", "hg", "pb"]
-        for key in expected_keys:
-            self.assertIn(key, emissions, f"Incineration emissions should include '{key}'.")
-            self.assertTrue(hasattr(emissions[key], "units"), f"Emission '{key}' should have units.")
+        self.assertEqual(set(magnitudes), set(emissions))
+        for key, amount in magnitudes.items():
+            self.assertIsInstance(amount, float)
+            self.assertEqual(amount, emissions[key].to("kg").magnitude)
 
-    def test_landfill_process(self):
-        proc = LandfillProcess("Landfill", config.EMISSION_FACTORS["LANDFILL"])
+    def test_emissions_as_array(self):
+        """Test that an emissions dictionary packs into one array-valued quantity keyed by emission."""
+        proc = PyrolysisProcess("Pyrolysis", config.EMISSION_FACTORS["PYROLYSIS"])
         emissions = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
-        expected_keys = ["ch4_biogenic", "co2_biogenic", "hg", "pb", "nmvoc", "nh3"]
-        for key in expected_keys:
-            self.assertIn(key, emissions, f"Landfill emissions should include '{key}'.")
-            self.assertTrue(hasattr(emissions[key], "units"), f"Emission '{key}' should have units.")
+        index, amounts = emissions_as_array(emissions)
+        self.assertIsInstance(amounts.magnitude, np.ndarray)
+        self.assertEqual(amounts.units, ureg.kilogram)
+        self.assertEqual(set(index), set(emissions))
+        for key, amount in emissions.items():
+            self.assertEqual(amounts.magnitude[index[key]], amount.magnitude)
+        # Quantities in other units are converted to the array's unit.
+        _, grams = emissions_as_array({"co2_fossil": 500 * ureg.gram, "so2": 2.0})
+        np.testing.assert_allclose(grams.magnitude, [0.5, 2.0])
+
+    def test_microwave_emission_limits(self):
+        """Test that the microwave emission limits cap the emissions, stream by stream and in a batch."""
+        micro_factors = dict(
+            _MICRO_DEFAULTS, emission_limits={"nmvoc": 1e-6, "pm25": 1e-6}, enforce_emission_limits=True
+        )
+        proc = MicrowaveProcess("Microwave", micro_factors)
+        uncapped = MicrowaveProcess("Microwave", dict(micro_factors, enforce_emission_limits=False))
+        emissions = proc.calculate_direct_magnitudes(self.waste_stream)
+        self.assertAlmostEqual(emissions["nmvoc"], 100 * 1e-6)
+        self.assertAlmostEqual(emissions["pm25"], 100 * 1e-6)
+        # PM10 has no limit, so it is not capped.
+        self.assertEqual(emissions["pm10"], uncapped.calculate_direct_magnitudes(self.waste_stream)["pm10"])
+        batch_emissions = proc.calculate_direct_magnitudes_batch(WasteStreamBatch.from_streams([self.waste_stream]))
+        for key, amount in emissions.items():
+            self.assertAlmostEqual(batch_emissions[key][0], amount)
 
-    def test_pyrolysis_process(self):
+    def test_microwave_none_limit_is_uncapped(self):
+        """Test that a pollutant whose limit is None is left uncapped, stream by stream and in a batch."""
+        micro_factors = dict(
+            _MICRO_DEFAULTS, emission_limits={"nmvoc": None, "pm10": None, "pm25": 1e-6}, enforce_emission_limits=True
+        )
+        proc = MicrowaveProcess("Microwave", micro_factors)
+        uncapped = MicrowaveProcess("Microwave", dict(micro_factors, enforce_emission_limits=False))
+        emissions = proc.calculate_direct_magnitudes(self.waste_stream)
+        uncapped_emissions = uncapped.calculate_direct_magnitudes(self.waste_stream)
+        self.assertEqual(emissions["nmvoc"], uncapped_emissions["nmvoc"])
+        self.assertEqual(emissions["pm10"], uncapped_emissions["pm10"])
+        self.assertAlmostEqual(emissions["pm25"], 100 * 1e-6)
+        batch_emissions = proc.calculate_direct_magnitudes_batch(WasteStreamBatch.from_streams([self.waste_stream]))
+        for key, amount in emissions.items():
+            self.assertAlmostEqual(batch_emissions[key][0], amount)
+
+    def test_config_factors_are_read_only(self):
+        """Test that scenario adjustments work on a copy and the shared factors cannot be modified."""
+        factors = config.EMISSION_FACTORS["INCINERATION"]
+        nox_per_waste = factors["nox_per_waste"]
+        IncinerationProcess("Incineration", factors).calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
+        self.assertEqual(factors["nox_per_waste"], nox_per_waste, "Scenario adjustments should not modify the config.")
+        with self.assertRaises(TypeError):
+            factors["nox_per_waste"] = 0.0
+
+    def test_emission_matrix_matches_vectors(self):
+        """Test that each row of the batched emission matrix matches the stream's emission vector."""
+        streams = [self.waste_stream, WasteStream(mass=2 * ureg.tonne)]
+        proc = LandfillProcess("Landfill", config.EMISSION_FACTORS["LANDFILL"])
+        matrix = proc.calculate_direct_emission_matrix(WasteStreamBatch.from_streams(streams), scenario=self.scenario)
+        self.assertEqual(matrix.shape, (len(streams), len(config.FLOW_ORDER)))
+        for row, stream in zip(matrix, streams):
+            np.testing.assert_allclose(row, proc.calculate_direct_emission_vector(stream, scenario=self.scenario))
+
+    def test_emissions_vector_matches_matrix_lci(self):
+        """Test that the emission vector follows a given flow index and feeds a matrix product directly."""
+        proc = IncinerationProcess("Incineration", config.EMISSION_FACTORS["INCINERATION"])
+        magnitudes = proc.calculate_direct_magnitudes(self.waste_stream, scenario=self.scenario)
+        # A biosphere index in a different order than config.FLOW_ORDER, with one extra flow.
+        flow_index = {key: row for row, key in enumerate(reversed(config.FLOW_ORDER + ("other_flow",)))}
+        vector = proc.calculate_direct_emission_vector(self.waste_stream, scenario=self.scenario, flow_index=flow_index)
+        self.assertEqual(vector.shape, (len(flow_index),))
+        for key, amount in magnitudes.items():
+            self.assertEqual(vector[flow_index[key]], amount)
+        self.assertEqual(np.count_nonzero(vector), np.count_nonzero(list(magnitudes.values())))
+        # One characterization row over the index gives the same score as summing emission by emission.
+        factors = np.arange(1.0, len(flow_index) + 1.0)
+        expected = sum(factors[flow_index[key]] * amount for key, amount in magnitudes.items())
+        self.assertAlmostEqual(factors @ vector, expected, delta=abs(expected) * 1e-12)
+        with self.assertRaises(KeyError):
+            proc.calculate_direct_emission_vector(self.waste_stream, flow_index={"co2_fossil": 0})
+
+    def test_emission_result_fields(self):
+        """Test that the emission result is a named tuple whose fields are the process's emission keys."""
         proc = PyrolysisProcess("Pyrolysis", config.EMISSION_FACTORS["PYROLYSIS"])
-        emissions = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
-        expected_keys = ["co2_fossil", "ch4_fossil", "nmvoc", "pahs", "dioxin", "hg", "pb"]
-        for key in expected_keys:
-            self.assertIn(key, emissions, f"Pyrolysis emissions should include '{key}'.")
-            self.assertTrue(hasattr(emissions[key], "units"), f"Emission '{key}' should have units.")
-
-    def test_chem_disinfection_process(self):
-        # Use dummy emission factors if CHEM_DISINFECTION factors are not defined in config.
-        chem_factors = config.EMISSION_FACTORS.get("CHEM_DISINFECTION", {
-            "disinfectant_ratio": 0.1,
-            "chlorine_loss": 0.05,
-            "chlorine_to_hcl_split": 0.6,
-            "nitrogen_content": 0.03,
-            "nitrogen_to_nh3": 0.2,
-            "nmvoc_per_organic": 1e-15,
-            "pm10_per_organic": 2e-7
-        })
-        proc = ChemDisinfectionProcess("Chemical Disinfection", chem_factors)
-        emissions = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
-        expected_keys = ["chlorine_air", "nmvoc", "nh3", "pm10"]
-        for key in expected_keys:
-            self.assertIn(key, emissions, f"Chemical Disinfection emissions should include '{key}'.")
-            self.assertTrue(hasattr(emissions[key], "units"), f"Emission '{key}' should have units.")
-
-    def test_autoclave_process(self):
-        # Use dummy factors for Autoclave if not defined in config.
-        auto_factors = config.EMISSION_FACTORS.get("AUTOCLAVE", {
-            "nmvoc_per_organic": 1e-5,
-            "pm10_per_organic": 5e-5,
-            "pm25_per_organic": 3e-5,
-            "elec_per_waste": 0.6,
-            "grid_co2_factor": 0.4,
-            "baseline_temp": 121,
-            "operating_temp": 134,
-            "nmvoc_temp_coeff": 0.2,
-            "hg_leach_factor": 0.001
-        })
-        proc = AutoclaveProcess("Autoclave", auto_factors)
-        emissions = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
-        expected_keys = ["nmvoc", "pm10", "pm25", "co2_fossil", "hg"]
-        for key in expected_keys:
-            self.assertIn(key, emissions, f"Autoclave emissions should include '{key}'.")
-            self.assertTrue(hasattr(emissions[key], "units"), f"Emission '{key}' should have units.")
-
-    def test_microwave_process(self):
-        # Use dummy factors for Microwave if not defined in config.
-        micro_factors = config.EMISSION_FACTORS.get("MICROWAVE", {
-            "nmvoc_per_organic": 0.002,
-            "pm10_per_organic": 0.0006,
-            "pm25_per_organic": 0.0004,
-            "base_frequency": 2450,
-            "operating_frequency": 915,
-            "freq_impact_per_mhz": 0.0002,
-            "plastic_nmvoc_boost": 0.8,
-            "elec_per_waste": 0.7,
-            "grid_co2_factor": 0.4,
-            "metal_aerosol_factor": 0.005,
-            "emission_limits": {
-                "nmvoc": 0.003,
-                "pm10": 0.002,
-                "pm25": 0.001,
+        result = proc.calculate_emission_result(self.waste_stream, scenario=self.scenario)
+        self.assertEqual(result._fields, proc.emission_keys)
+        self.assertEqual(result._asdict(), proc.calculate_direct_magnitudes(self.waste_stream, scenario=self.scenario))
+
+    def test_zero_mass_stream(self):
+        """Test that a waste stream without mass yields zero for every emission of the process."""
+        empty_stream = WasteStream(mass=0 * KG)
+        proc = IncinerationProcess("Incineration", config.EMISSION_FACTORS["INCINERATION"])
+        emissions = proc.calculate_direct_emissions(empty_stream, scenario=self.scenario)
+        self.assertEqual(set(emissions), set(proc.calculate_direct_magnitudes(self.waste_stream, scenario=self.scenario)))
+        for key, amount in emissions.items():
+            self.assertEqual(amount.magnitude, 0.0, f"Emission '{key}' of an empty stream should be zero.")
+            self.assertTrue(hasattr(amount, "units"), f"Emission '{key}' should have units.")
+        self.assertFalse(proc.calculate_direct_emission_vector(empty_stream, scenario=self.scenario).any())
+
+    def test_factors_bound_at_init(self):
+        """Test that the factors a process reads are bound to attributes when it is created."""
+        factors = config.EMISSION_FACTORS["LANDFILL"]
+        proc = LandfillProcess("Landfill", factors)
+        for key in proc.factor_keys:
+            self.assertEqual(getattr(proc, key), factors[key])
+        self.assertIsNone(LandfillProcess("Landfill", {}).ch4_split)
+        self.assertEqual(IncinerationProcess("Incineration", {}).combustion_efficiency, 1.0)
+
+    def test_scenario_signature(self):
+        """Test that a process's scenario signature only contains the scenario parameters it reads."""
+        incineration = IncinerationProcess("Incineration", config.EMISSION_FACTORS["INCINERATION"])
+        pyrolysis = PyrolysisProcess("Pyrolysis", config.EMISSION_FACTORS["PYROLYSIS"])
+        self.assertEqual(incineration.scenario_signature(self.scenario), (("incineration_flue_gas_efficiency", 0.5),))
+        self.assertEqual(pyrolysis.scenario_signature(self.scenario), ())
+
+    def test_batch_matches_single_streams(self):
+        """Test that the batched emissions match the emissions calculated stream by stream."""
+        streams = [self.waste_stream, self.waste_stream.adjust_for_segregation(0.5), WasteStream(mass=2 * ureg.tonne)]
+        batch = WasteStreamBatch.from_streams(streams)
+        for proc in (
+            IncinerationProcess("Incineration", config.EMISSION_FACTORS["INCINERATION"]),
+            LandfillProcess("Landfill", config.EMISSION_FACTORS["LANDFILL"]),
+            PyrolysisProcess("Pyrolysis", config.EMISSION_FACTORS["PYROLYSIS"]),
+        ):
+            emissions = proc.calculate_direct_emissions_batch(batch, scenario=self.scenario)
+            for i, stream in enumerate(streams):
+                for key, amount in proc.calculate_direct_magnitudes(stream, scenario=self.scenario).items():
+                    self.assertEqual(emissions[key].units, ureg.kilogram)
+                    self.assertAlmostEqual(emissions[key].magnitude[i], amount, delta=abs(amount) * 1e-12)
+
+    def test_batch_accepts_non_float64_inputs(self):
+        """
+        Test that integer masses and float32 fractions give the same batched emissions as float64 inputs.
+
+        With Numba installed this goes through the compiled kernels, which only accept float64 arrays.
+        """
+        streams = [self.waste_stream, WasteStream(mass=2 * ureg.tonne)]
+        batch = WasteStreamBatch.from_streams(streams)
+        mixed_batch = WasteStreamBatch(
+            mass_kg=batch.mass_kg.astype(np.int64),
+            composition={
+                group: {material: fraction.astype(np.float32) for material, fraction in fractions.items()}
+                for group, fractions in batch.composition.items()
             },
-            "enforce_emission_limits": True
-        })
-        proc = MicrowaveProcess("Microwave", micro_factors)
-        emissions = proc.calculate_direct_emissions(self.waste_stream, scenario=self.scenario)
-        expected_keys = ["nmvoc", "pm10", "pm25", "co2_fossil", "pb"]
-        for key in expected_keys:
-            self.assertIn(key, emissions, f"Microwave emissions should include '{key}'.")
-            self.assertTrue(hasattr(emissions[key], "units"), f"Emission '{key}' should have units.")
+        )
+        self.assertEqual(mixed_batch.mass_kg.dtype, np.float64)
+        self.assertEqual(mixed_batch.total_organic.dtype, np.float64)
+        for process_cls, factor_key, name, _ in _PROCESS_CASES:
+            with self.subTest(process=process_cls.__name__, numba=NUMBA_AVAILABLE):
+                factors = config.EMISSION_FACTORS.get(factor_key) or _DUMMY_FACTORS[factor_key]
+                proc = process_cls(name, factors)
+                expected = proc.calculate_direct_magnitudes_batch(batch, scenario=self.scenario)
+                emissions = proc.calculate_direct_magnitudes_batch(mixed_batch, scenario=self.scenario)
+                for key, amounts in expected.items():
+                    # The fractions were rounded to float32, so only float32 precision is expected.
+                    np.testing.assert_allclose(emissions[key], amounts, rtol=1e-6)
+
+    def test_batch_accepts_read_only_and_reshaped_inputs(self):
+        """
+        Test that read-only, 2-D and 0-d inputs give the same batched emissions as the batch built from streams.
+
+        With Numba installed this goes through the compiled kernels, which only accept writable 1-D arrays.
+        """
+        streams = [self.waste_stream, WasteStream(mass=2 * ureg.tonne)]
+        batch = WasteStreamBatch.from_streams(streams)
+        read_only_mass = batch.mass_kg.copy()
+        read_only_mass.setflags(write=False)
+        read_only_batch = WasteStreamBatch(mass_kg=read_only_mass, composition=batch.composition)
+        self.assertTrue(read_only_batch.mass_kg.flags.writeable)
+        column_batch = WasteStreamBatch(
+            mass_kg=batch.mass_kg.reshape(-1, 1),
+            composition={
+                group: {material: np.broadcast_to(fraction[0], (2,)) for material, fraction in fractions.items()}
+                for group, fractions in WasteStreamBatch.from_streams(streams[:1]).composition.items()
+            },
+        )
+        scalar_batch = WasteStreamBatch(
+            mass_kg=np.float64(self.waste_stream.mass_kg), composition=self.waste_stream.composition
+        )
+        self.assertEqual(column_batch.mass_kg.shape, (2,))
+        self.assertEqual(len(scalar_batch), 1)
+        for process_cls, factor_key, name, _ in _PROCESS_CASES:
+            with self.subTest(process=process_cls.__name__, numba=NUMBA_AVAILABLE):
+                factors = config.EMISSION_FACTORS.get(factor_key) or _DUMMY_FACTORS[factor_key]
+                proc = process_cls(name, factors)
+                expected = proc.calculate_direct_magnitudes_batch(batch, scenario=self.scenario)
+                read_only = proc.calculate_direct_magnitudes_batch(read_only_batch, scenario=self.scenario)
+                column = proc.calculate_direct_magnitudes_batch(column_batch, scenario=self.scenario)
+                scalar = proc.calculate_direct_magnitudes_batch(scalar_batch, scenario=self.scenario)
+                for key, amounts in expected.items():
+                    np.testing.assert_array_equal(read_only[key], amounts)
+                    np.testing.assert_array_equal(column[key], amounts)
+                    np.testing.assert_array_equal(scalar[key], amounts[:1])
+
+    def test_landfill_batch_without_biodegradable_materials(self):
+        """Test that a landfill batch lacking the fast and slow biodegradable materials matches its streams."""
+        composition = {group: {} for group in self.waste_stream.composition}
+        composition["metallic_materials"] = {"mercury_waste": 0.01}
+        streams = [WasteStream(mass=mass, composition=composition) for mass in (self.mass, 2 * ureg.tonne)]
+        proc = LandfillProcess("Landfill", config.EMISSION_FACTORS["LANDFILL"])
+        batch = WasteStreamBatch.from_streams(streams)
+        batch_emissions = proc.calculate_direct_magnitudes_batch(batch, scenario=self.scenario)
+        for index, stream in enumerate(streams):
+            for key, amount in proc.calculate_direct_magnitudes(stream, scenario=self.scenario).items():
+                self.assertAlmostEqual(batch_emissions[key][index], amount, delta=abs(amount) * 1e-12)
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,17 +1,16 @@
 # HospitalWasteManagement/tests/test_waste_stream.py
 
 import unittest
+import numpy as np
 import pint
-from src.waste_stream import WasteStream
+from src.units import ureg, KG
+from src.waste_stream import WasteStream, WasteStreamBatch
 from src import config  # To compare against default configuration values
 
-# Initialize the Pint unit registry.
-ureg = pint.UnitRegistry()
-
 class TestWasteStream(unittest.TestCase):
     def setUp(self):
         # Create a WasteStream instance with a mass of 100 kg.
-        self.mass = 100 * ureg("kg")
+        self.mass = 100 * KG
         self.waste_stream = WasteStream(mass=self.mass)
 
     def test_adjust_for_segregation(self):
@@ -33,6 +32,35 @@ class TestWasteStream(unittest.TestCase):
             msg="The 'needles_sharps_plastic' fraction should be reduced by the efficiency factor."
         )
 
+    def test_adjust_for_segregation_efficiencies(self):
+        """
+        Test that the hazardous fractions scale with the efficiency over the whole efficiency range.
+        """
+        original_value = self.waste_stream.composition["organic_materials"]["needles_sharps_plastic"]
+        for efficiency in np.linspace(0.1, 1.0, 10):
+            with self.subTest(efficiency=efficiency):
+                adjusted_ws = self.waste_stream.adjust_for_segregation(efficiency)
+                self.assertAlmostEqual(
+                    adjusted_ws.composition["organic_materials"]["needles_sharps_plastic"],
+                    original_value * efficiency,
+                )
+
+    def test_adjust_for_segregation_batch(self):
+        """
+        Test that adjusting for several efficiencies at once matches adjusting for each one separately.
+        """
+        efficiencies = np.array([0.1, 0.3, 0.5, 0.8, 1.0])
+        batch = self.waste_stream.adjust_for_segregation_batch(efficiencies)
+        self.assertEqual(len(batch), len(efficiencies))
+        for i, efficiency in enumerate(efficiencies):
+            adjusted_ws = self.waste_stream.adjust_for_segregation(efficiency)
+            self.assertEqual(batch.mass_kg[i], adjusted_ws.mass_kg)
+            for group, fractions in adjusted_ws.composition.items():
+                for material, fraction in fractions.items():
+                    self.assertEqual(batch.composition[group][material][i], fraction)
+            self.assertAlmostEqual(batch.total_organic[i], adjusted_ws.total_organic)
+            self.assertAlmostEqual(batch.total_chlor[i], adjusted_ws.total_chlor)
+
     def test_original_composition_unchanged(self):
         """
         Test that adjusting the waste stream for segregation does not modify the original composition.
@@ -50,5 +78,59 @@ class TestWasteStream(unittest.TestCase):
             msg="The original waste stream composition should remain unchanged after adjustment."
         )
 
+    def test_default_composition_independent(self):
+        """
+        Test that each waste stream gets its own copy of the default composition.
+        """
+        stream = WasteStream(mass=self.mass)
+        stream.composition["organic_materials"]["needles_sharps_plastic"] = 0.0
+        self.assertEqual(
+            WasteStream(mass=self.mass).composition,
+            config.DEFAULT_COMPOSITION,
+            msg="Modifying one stream's composition should not change the default of later streams."
+        )
+
+    def test_mass_kg(self):
+        """
+        Test that mass_kg holds the mass in kilograms, also for masses given in other units.
+        """
+        self.assertEqual(self.waste_stream.mass_kg, 100.0)
+        self.assertAlmostEqual(WasteStream(mass=2 * ureg.tonne).mass_kg, 2000.0)
+
+    def test_composition_totals(self):
+        """
+        Test that the cached composition totals match the composition, also after adjustment for segregation.
+        """
+        adjusted_ws = self.waste_stream.adjust_for_segregation(0.5)
+        for ws in (self.waste_stream, adjusted_ws):
+            self.assertAlmostEqual(ws.total_organic, sum(ws.composition["organic_materials"].values()))
+            self.assertAlmostEqual(ws.total_chlor, sum(ws.composition["chlorinated_materials"].values()))
+            self.assertEqual(ws.fossil_organic, ws.composition["organic_materials"]["needles_sharps_plastic"])
+            self.assertEqual(ws.mercury, ws.composition["metallic_materials"]["mercury_waste"])
+            self.assertEqual(ws.heavy_metals, ws.composition["metallic_materials"]["other_heavy_metals"])
+        self.assertLess(adjusted_ws.total_organic, self.waste_stream.total_organic)
+
+    def test_shared_unit_registry(self):
+        """
+        Test that the shared registry is Pint's application registry, so quantities from either combine directly.
+        """
+        app_mass = pint.get_application_registry().Quantity(1, "tonne")
+        self.assertEqual((self.waste_stream.mass + app_mass).to("kg").magnitude, 1100)
+
+    def test_batch_from_streams(self):
+        """
+        Test that a batch built from waste streams holds each stream's mass and composition totals.
+        """
+        streams = [self.waste_stream, self.waste_stream.adjust_for_segregation(0.5)]
+        batch = WasteStreamBatch.from_streams(streams)
+        self.assertEqual(len(batch), 2)
+        for i, ws in enumerate(streams):
+            self.assertEqual(batch.mass_kg[i], ws.mass_kg)
+            self.assertAlmostEqual(batch.total_organic[i], ws.total_organic)
+            self.assertAlmostEqual(batch.total_chlor[i], ws.total_chlor)
+            self.assertEqual(batch.fossil_organic[i], ws.fossil_organic)
+            self.assertEqual(batch.mercury[i], ws.mercury)
+            self.assertEqual(batch.heavy_metals[i], ws.heavy_metals)
+
 if __name__ == '__main__':
     unittest.main()